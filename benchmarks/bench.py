@@ -0,0 +1,182 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from pqcutil import instrument
+
+# Benchmarks for every primitive and parameter set. Each case reports
+# ops/sec, latency percentiles and peak traced memory; results go to JSON
+# and can be compared against an earlier run to flag regressions.
+#
+#   python -m benchmarks.bench --output run.json
+#   python -m benchmarks.bench --compare baseline.json --fail-on-regression
+#   python -m benchmarks.bench --profile --profile-jsonl stages.jsonl
+#
+# With --profile, one extra call per case runs with pqcutil.instrument
+# enabled (outside the timed loop) and its per-stage counters are stored
+# with the case, and optionally appended as JSON lines.
+
+profile = False
+
+def measure(fn, min_time=0.5, min_runs=3, max_runs=1000):
+    fn()  # warm-up: tables, caches, lazy imports
+    times = []
+    start = time.perf_counter()
+    while len(times) < min_runs or (time.perf_counter() - start < min_time and len(times) < max_runs):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stages = None
+    if profile:
+        instrument.reset()
+        instrument.enable()
+        try:
+            fn()
+        finally:
+            instrument.disable()
+        stages = instrument.snapshot()
+    return np.array(times), peak, stages
+
+def record(name, params, times, peak, stages=None, ops_per_call=1):
+    result = {
+        "name": name,
+        "params": params,
+        "runs": len(times),
+        "ops_per_sec": ops_per_call * len(times) / float(times.sum()),
+        "mean_ms": float(times.mean() * 1e3),
+        "p50_ms": float(np.percentile(times, 50) * 1e3),
+        "p90_ms": float(np.percentile(times, 90) * 1e3),
+        "p99_ms": float(np.percentile(times, 99) * 1e3),
+        "peak_mem_bytes": int(peak),
+    }
+    if stages is not None:
+        result["stages"] = stages
+    return result
+
+def kyber_cases(k, batches, min_time):
+    from kyber import kyber_256_final as kem
+    from kyber.batch import encode_messages, noise_parameters
+    from kyber.keys import generate_keypair
+    from kyber.poly import Poly, PolyVec, PolyMat
+    from pqcutil.sampling import cbd
+
+    n = 256
+    eta1, eta2 = noise_parameters(k)
+    A = PolyMat(np.random.randint(0, kem.q, (k, k, n)))
+    s = PolyVec(cbd(eta1, (k, n)))
+    e = PolyVec(cbd(eta1, (k, n)))
+    t = kem.generate_public_key(A, s, e)
+    r = PolyVec(cbd(eta1, (k, n)))
+    e1 = PolyVec(cbd(eta2, (k, n)))
+    e2 = Poly(cbd(eta2, n))
+    message = Poly(encode_messages(np.random.randint(0, 2, n)))
+    u, v = kem.encapsulate(A, t, message, r, e1, e2)
+
+    params = {"scheme": "kyber", "k": k}
+    yield record("generate_public_key", params, *measure(lambda: kem.generate_public_key(A, s, e), min_time))
+    yield record("encapsulate", params, *measure(lambda: kem.encapsulate(A, t, message, r, e1, e2), min_time))
+    yield record("decapsulate", params, *measure(lambda: kem.decapsulate(s, u, v), min_time))
+    yield record("generate_keypair", params, *measure(lambda: generate_keypair(k), min_time))
+
+    pk, sk = generate_keypair(k)
+    for batch in batches:
+        messages = encode_messages(np.random.randint(0, 2, (batch, n)))
+        bu, bv = pk.encapsulate(messages)
+        bparams = dict(params, batch=batch)
+        yield record("encapsulate_batch", bparams, *measure(lambda: pk.encapsulate(messages), min_time), ops_per_call=batch)
+        yield record("decapsulate_batch", bparams, *measure(lambda: sk.decapsulate(bu, bv), min_time), ops_per_call=batch)
+
+def falcon_cases(n, batches, min_time):
+    from falcon import falcon_fft
+
+    params = {"scheme": "falcon", "n": n}
+    yield record("falcon_keygen", params, *measure(lambda: falcon_fft.falcon_keygen(n), min_time, min_runs=1, max_runs=5))
+    sk, h = falcon_fft.falcon_keygen(n)
+    msg = "benchmark message"
+    sig = falcon_fft.sign_message(msg, sk)
+    yield record("sign_message", params, *measure(lambda: falcon_fft.sign_message(msg, sk), min_time))
+    yield record("verify_signature", params, *measure(lambda: falcon_fft.verify_signature(msg, sig, h), min_time))
+    for batch in batches:
+        messages = [f"{msg} {i}" for i in range(batch)]
+        sigs = ([sig[0]] * batch, np.repeat(sig[1][None], batch, axis=0))  # throughput only, the mask is not checked
+        yield record("verify_batch", dict(params, batch=batch),
+                     *measure(lambda: falcon_fft.verify_batch(messages, sigs, h), min_time), ops_per_call=batch)
+
+def case_key(result):
+    return result["name"], tuple(sorted(result["params"].items()))
+
+def compare(results, baseline, tolerance):
+    # regressions: cases whose ops/sec dropped by more than tolerance
+    before = {case_key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        old = before.get(case_key(r))
+        if old is None:
+            continue
+        ratio = r["ops_per_sec"] / old["ops_per_sec"]
+        r["baseline_ops_per_sec"] = old["ops_per_sec"]
+        r["ratio"] = ratio
+        if ratio < 1 - tolerance:
+            regressions.append(r)
+    return regressions
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench")
+    parser.add_argument("--kyber-k", type=int, nargs="*", default=[2, 3, 4])
+    parser.add_argument("--falcon-n", type=int, nargs="*", default=[512, 1024])
+    parser.add_argument("--batch", type=int, nargs="*", default=[1, 10, 100, 1000, 10000])
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds spent per case")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed ops/sec drop before a case counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--profile", action="store_true", help="record per-stage counters for every case")
+    parser.add_argument("--profile-jsonl", help="append the per-stage counters to this JSON lines file (implies --profile)")
+    args = parser.parse_args(argv)
+    global profile
+    profile = args.profile or bool(args.profile_jsonl)
+
+    results = []
+    cases = [kyber_cases(k, args.batch, args.min_time) for k in args.kyber_k]
+    cases += [falcon_cases(n, args.batch, args.min_time) for n in args.falcon_n]
+    for group in cases:
+        for r in group:
+            results.append(r)
+            params = " ".join(f"{key}={value}" for key, value in r["params"].items())
+            print(f"{r['name']:<20} {params:<32} {r['ops_per_sec']:>12.1f} ops/s  "
+                  f"p50 {r['p50_ms']:.3f} ms  p99 {r['p99_ms']:.3f} ms  peak {r['peak_mem_bytes'] / 1024:.0f} KiB")
+            if args.profile_jsonl:
+                instrument.write_jsonl(args.profile_jsonl, {"case": r["name"], **r["params"]}, r["stages"])
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['name']} {r['params']}: {r['ops_per_sec']:.1f} ops/s vs {r['baseline_ops_per_sec']:.1f} ({r['ratio']:.2f}x)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "results": results,
+                       "regressions": [{"name": r["name"], "params": r["params"]} for r in regressions]}, f, indent=2)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
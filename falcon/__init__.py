@@ -0,0 +1,22 @@
+# Simplified Falcon over Zq[x]/(x^n + 1), q = 12289, n = 512 or 1024.
+# Nothing is computed on import: the public names below resolve to their
+# submodules on first access, and the demos only run from
+# `python -m falcon <command>`.
+
+import importlib
+
+_exports = {
+    "falcon_keygen": "falcon_fft", "sign_message": "falcon_fft",
+    "verify_signature": "falcon_fft", "verify_batch": "falcon_fft", "SecretKey": "falcon_fft",
+    "ntru_gen": "ntrugen",
+    "hash_to_point": "hashing",
+}
+
+__all__ = sorted(_exports)
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_exports[name]}", __name__), name)
+    globals()[name] = value
+    return value
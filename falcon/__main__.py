@@ -0,0 +1,23 @@
+import argparse
+import importlib
+import sys
+from pqcutil import instrument
+
+commands = {
+    "demo": ("falcon_fft", "keygen, ffSampling signature and verification"),
+    "demo-no-fft": ("falcon_simplified_no_fft", "the simplified s1 = f.c, s2 = g.c scheme"),
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m falcon")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text) in commands.items():
+        sub.add_parser(name, help=help_text)
+    args = parser.parse_args(argv)
+    importlib.import_module(f"falcon.{commands[args.command][0]}").main()
+    if instrument.enabled:
+        # PQC_PROFILE=1: per-stage counters as JSON lines on stderr
+        instrument.write_jsonl(sys.stderr, {"command": f"falcon {args.command}"})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+from collections import OrderedDict
+import numpy as np
+from pqcutil.instrument import stage, timed
+from . import fft as cfft
+from . import ntt as ring
+from .ffsampling import gram, ffldl, normalize_tree, ffsampling
+from .ntrugen import ntru_gen
+from .hashing import hash_to_point, random_salt
+
+q = 12289
+
+# Falcon signing with the full trapdoor: the secret basis [[g, -f], [G, -F]]
+# is turned into an ffLDL* tree once per key, and every signature samples a
+# lattice point close to (c, 0) with ffsampling. c = HashToPoint(salt || msg)
+# and a signature is the pair (salt, s2).
+
+params = {
+    512: {"sigma": 165.7366171829776, "sigma_min": 1.2778336969128337, "sig_bound": 34034726},
+    1024: {"sigma": 168.38857144654395, "sigma_min": 1.298280334344292, "sig_bound": 70265242},
+}
+
+class SecretKey:
+    def __init__(self, f, g, F, G):
+        self.n = len(f)
+        self.f, self.g, self.F, self.G = f, g, F, G
+        self.sigma = params[self.n]["sigma"]
+        self.sigma_min = params[self.n]["sigma_min"]
+        self.sig_bound = params[self.n]["sig_bound"]
+        self.h = ring.div(g, f)
+        self._basis = None
+        self._tree = None
+
+    @property
+    def basis(self):
+        # B = [[g, -f], [G, -F]] in the FFT domain
+        if self._basis is None:
+            f, g, F, G = (cfft.fft(a) for a in (self.f, self.g, self.F, self.G))
+            self._basis = [[g, -f], [G, -F]]
+        return self._basis
+
+    @property
+    def tree(self):
+        # normalised ffLDL* tree, built on first signature and kept
+        if self._tree is None:
+            self._tree = normalize_tree(ffldl(gram(self.basis)), self.sigma)
+        return self._tree
+
+def falcon_keygen(n=512):
+    sk = SecretKey(*ntru_gen(n))
+    return sk, sk.h
+
+def _centered(a):
+    a = np.asarray(a, dtype=np.int64) % q
+    return np.where(a > q // 2, a - q, a)
+
+def _in_range(s):
+    # a valid s1 / s2 has centred coefficients, -q/2 <= x <= q/2; anything
+    # else is rejected before the norm (np.abs would wrap on -2^63)
+    return np.all((s >= -(q // 2)) & (s <= q // 2), axis=-1)
+
+def _norm_squared(s1, s2):
+    # per row; on in-range rows every square is below 2^26 and n of them
+    # below 2^37, so the int64 sum cannot wrap
+    return np.sum(s1 * s1, axis=-1) + np.sum(s2 * s2, axis=-1)
+
+@timed("falcon.sign")
+def sign_message(msg, sk, rng=None, salt=None):
+    # msg: str, bytes-like, mmap, path or binary file object (see hashing.absorb)
+    salt = random_salt() if salt is None else bytes(salt)
+    c = hash_to_point(msg, sk.n, salt)
+    c_fft = cfft.fft(c)
+    (b00, b01), (b10, b11) = sk.basis
+    t0 = c_fft * b11 / q  # (c, 0).B^-1 = (c*(-F), c*f) / q
+    t1 = -c_fft * b01 / q
+    while True:
+        with stage("falcon.ffsampling") as st:
+            z0, z1 = ffsampling((t0, t1), sk.tree, sk.sigma_min, rng)
+            st.add(coeff_ops=2 * sk.n, alloc_bytes=z0.nbytes + z1.nbytes)
+        d0, d1 = t0 - z0, t1 - z1
+        s1 = np.rint(cfft.ifft(d0 * b00 + d1 * b10)).astype(np.int64)
+        s2 = np.rint(cfft.ifft(d0 * b01 + d1 * b11)).astype(np.int64)
+        if _in_range(s1) and _in_range(s2) and _norm_squared(s1, s2) <= sk.sig_bound:
+            return salt, s2
+
+# NTT of each public key, computed on first use and kept (LRU over the key
+# bytes), so verifiers holding a few keys never transform h again
+h_cache_size = 64
+_h_cache = OrderedDict()
+
+def h_ntt(h):
+    h = np.asarray(h, dtype=np.int64)
+    key = h.tobytes()
+    if key in _h_cache:
+        _h_cache.move_to_end(key)
+        return _h_cache[key]
+    h_hat = ring.ntt(h)
+    h_hat.flags.writeable = False
+    _h_cache[key] = h_hat
+    if len(_h_cache) > h_cache_size:
+        _h_cache.popitem(last=False)
+    return h_hat
+
+@timed("falcon.verify")
+def verify_batch(messages, signatures, h):
+    # messages: batch of messages, signatures: (salts, s2) with one salt per
+    # message and (batch, n) s2 rows -> (batch,) bool mask
+    n = len(h)
+    salts, s2 = signatures
+    s2 = np.asarray(s2, dtype=np.int64)
+    if s2.ndim != 2 or s2.shape != (len(messages), n) or len(salts) != len(messages):
+        raise ValueError(f"expected {len(messages)} salts and ({len(messages)}, {n}) signatures, got {len(salts)} and {s2.shape}")
+    c = np.zeros((len(messages), n), dtype=np.int64)
+    for i, (msg, salt) in enumerate(zip(messages, salts)):
+        c[i] = hash_to_point(msg, n, bytes(salt))
+    # s2 is taken as given, so rows with a coefficient outside [-q/2, q/2]
+    # are rejected outright; otherwise s2 = 2^32 y (mod q) makes s1 = 0 and
+    # the squares of s2 wrap int64 to 0
+    valid = _in_range(s2)
+    s2 = np.where(valid[:, None], s2, 0)
+    s1 = _centered(ring.sub(c, ring.intt(ring.mul_ntt(ring.ntt(s2), h_ntt(h)))))
+    return valid & (_norm_squared(s1, s2) <= params[n]["sig_bound"])
+
+def verify_signature(msg, signature, h):
+    salt, s2 = signature
+    return bool(verify_batch([msg], ([salt], np.asarray(s2)[None]), h)[0])
+
+def main():
+    sk, h = falcon_keygen(512)
+    message = "SudeepIsSigningThisDocument"
+    signature = sign_message(message, sk)
+    print("Message:", message)
+    print()
+    print("Salt:", signature[0].hex())
+    print()
+    print("Signature (s2):", signature[1])
+    print()
+    print("Public key (h):", h)
+    print()
+    print("Signature valid:", verify_signature(message, signature, h))
+
+if __name__ == "__main__":
+    main()
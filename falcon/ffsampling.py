@@ -0,0 +1,81 @@
+import numpy as np
+from pqcutil import sampling
+from . import fft as cfft
+
+# Fast Fourier sampling over the secret basis B = [[g, -f], [G, -F]].
+# The ffLDL* tree of the Gram matrix B.B* is built once per key, every
+# signature then walks it with ffsampling in O(n log n).
+
+sigma_max = 1.8205
+_base_cdf = None
+
+def gram(B):
+    # B: 2x2 nested list of FFT arrays -> B.B*
+    rows = len(B)
+    return [[sum(B[i][k] * cfft.adj(B[j][k]) for k in range(len(B[i])))
+             for j in range(rows)] for i in range(rows)]
+
+def ldl(G):
+    # 2x2 LDL* decomposition in the FFT domain
+    D00 = G[0][0]
+    L10 = G[1][0] / G[0][0]
+    D11 = G[1][1] - L10 * cfft.adj(L10) * G[0][0]
+    return L10, D00, D11
+
+def ffldl(G):
+    # tree nodes are (L10, left, right), leaves are the real values of D
+    n = G[0][0].shape[-1]
+    L10, D00, D11 = ldl(G)
+    if n == 2:
+        return (L10, float(D00[0].real), float(D11[0].real))
+    d00, d01 = cfft.split(D00)
+    d10, d11 = cfft.split(D11)
+    G0 = [[d00, d01], [cfft.adj(d01), d00]]
+    G1 = [[d10, d11], [cfft.adj(d11), d10]]
+    return (L10, ffldl(G0), ffldl(G1))
+
+def normalize_tree(tree, sigma):
+    # replace every leaf D by the standard deviation sigma / sqrt(D)
+    L10, left, right = tree
+    if isinstance(left, tuple):
+        return (L10, normalize_tree(left, sigma), normalize_tree(right, sigma))
+    return (L10, sigma / np.sqrt(left), sigma / np.sqrt(right))
+
+def _half_gaussian_cdf():
+    global _base_cdf
+    if _base_cdf is None:
+        z = np.arange(0, 20)
+        p = np.exp(-z ** 2 / (2 * sigma_max ** 2))
+        _base_cdf = np.cumsum(p) / p.sum()
+    return _base_cdf
+
+def samplerz(mu, sigma, sigma_min, rng=None):
+    # discrete Gaussian over Z centred on mu with deviation sigma <= sigma_max,
+    # Falcon's SamplerZ: half-Gaussian base sample plus rejection. Uniforms
+    # come from rng.random(), by default the CSPRNG pool of pqcutil.sampling
+    # (predictable sampling randomness would leak the signing key)
+    rng = sampling.default_pool if rng is None else rng
+    s = int(np.floor(mu))
+    r = mu - s
+    dss = 1 / (2 * sigma * sigma)
+    cdf = _half_gaussian_cdf()
+    while True:
+        z0 = int(np.searchsorted(cdf, rng.random()))
+        b = int(rng.random() < 0.5)
+        z = b + (2 * b - 1) * z0
+        x = (z - r) ** 2 * dss - z0 ** 2 / (2 * sigma_max ** 2)
+        if rng.random() < sigma_min / sigma * np.exp(-x):
+            return z + s
+
+def ffsampling(t, tree, sigma_min, rng=None):
+    # t = (t0, t1) FFT arrays, returns z = (z0, z1) close to t
+    t0, t1 = t
+    n = t0.shape[-1]
+    if n == 1:
+        return (np.array([samplerz(t0[0].real, tree, sigma_min, rng)], dtype=complex),
+                np.array([samplerz(t1[0].real, tree, sigma_min, rng)], dtype=complex))
+    L10, left, right = tree
+    z1 = cfft.merge(ffsampling(cfft.split(t1), right, sigma_min, rng))
+    t0b = t0 + (t1 - z1) * L10
+    z0 = cfft.merge(ffsampling(cfft.split(t0b), left, sigma_min, rng))
+    return z0, z1
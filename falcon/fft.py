@@ -0,0 +1,47 @@
+import numpy as np
+from pqcutil.instrument import timed
+
+# Floating-point FFT representation of R[x]/(x^n + 1): a polynomial is
+# stored as its n complex evaluations at the roots zeta_j = e^(i*pi*(2j+1)/n).
+# With the psi twist, a backward numpy FFT evaluates exactly in that order,
+# so zeta_(j + n/2) = -zeta_j and splitting / merging is a pairwise butterfly.
+
+_roots = {}
+
+def roots(n):
+    if n not in _roots:
+        _roots[n] = np.exp(1j * np.pi * (2 * np.arange(n) + 1) / n)
+    return _roots[n]
+
+def _twist(n):
+    return np.exp(1j * np.pi * np.arange(n) / n)
+
+def _butterflies(out, *args):
+    return out.size * (out.shape[-1].bit_length() - 1)
+
+@timed("falcon.fft", ops=_butterflies)
+def fft(a):
+    a = np.asarray(a, dtype=np.float64)
+    n = a.shape[-1]
+    return np.fft.ifft(a * _twist(n)) * n
+
+@timed("falcon.ifft", ops=_butterflies)
+def ifft(a_fft):
+    n = a_fft.shape[-1]
+    return (np.fft.fft(a_fft) / (n * _twist(n))).real
+
+def adj(a):
+    # Hermitian adjoint a(1/x): conjugate evaluations
+    return np.conj(a)
+
+def split(a_fft):
+    # a(x) = a0(x^2) + x a1(x^2) -> (a0, a1), both of degree n/2
+    n = a_fft.shape[-1]
+    lo, hi = a_fft[..., :n // 2], a_fft[..., n // 2:]
+    return (lo + hi) / 2, (lo - hi) / (2 * roots(n)[:n // 2])
+
+def merge(f_list):
+    a0, a1 = f_list
+    n = 2 * a0.shape[-1]
+    w = roots(n)[:n // 2] * a1
+    return np.concatenate((a0 + w, a0 - w), axis=-1)
@@ -0,0 +1,67 @@
+import hashlib
+import os
+import numpy as np
+from pqcutil.instrument import timed
+
+q = 12289
+
+# HashToPoint: SHAKE-256(salt || message) read as big-endian 16-bit words,
+# words >= 5q rejected, the rest reduced mod q until n coefficients are
+# filled. The message is absorbed incrementally, so a file or mmap region
+# of any size is hashed in one pass with a constant-size buffer.
+
+salt_bytes = 40
+read_size = 1 << 20
+_limit = 5 * q  # 61445, the largest multiple of q below 2^16
+
+def absorb(shake, data):
+    # str (UTF-8 text), bytes-like (bytes, bytearray, memoryview, mmap),
+    # a path, a binary file object, or an iterable of bytes-like chunks
+    if isinstance(data, str):
+        shake.update(data.encode())
+    elif isinstance(data, os.PathLike):
+        with open(data, "rb") as f:
+            absorb(shake, f)
+    elif _is_buffer(data):
+        # buffer protocol first: an mmap also has read / readinto, but must
+        # be hashed whole and without moving its cursor
+        with memoryview(data) as raw, raw.cast("B") as view:
+            for lo in range(0, len(view), read_size):
+                shake.update(view[lo:lo + read_size])
+    elif hasattr(data, "readinto"):
+        buf = bytearray(read_size)
+        view = memoryview(buf)
+        while True:
+            size = data.readinto(buf)
+            if not size:
+                break
+            shake.update(view[:size])
+    elif hasattr(data, "read"):
+        for chunk in iter(lambda: data.read(read_size), b""):
+            shake.update(chunk)
+    else:
+        for chunk in data:
+            shake.update(chunk)
+    return shake
+
+def _is_buffer(data):
+    try:
+        memoryview(data).release()
+    except TypeError:
+        return False
+    return True
+
+@timed("falcon.hash_to_point", ops=lambda out, *args, **kwargs: out.size)
+def hash_to_point(data, n, salt=b""):
+    shake = absorb(hashlib.shake_256(bytes(salt)), data)
+    # about 6% of words are rejected; squeeze more if a draw comes up short
+    size = 2 * (n + n // 8 + 16)
+    while True:
+        words = np.frombuffer(shake.digest(size), dtype=">u2")
+        words = words[words < _limit]
+        if len(words) >= n:
+            return (words[:n] % q).astype(np.int64)
+        size *= 2
+
+def random_salt():
+    return os.urandom(salt_bytes)
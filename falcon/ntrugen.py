@@ -0,0 +1,135 @@
+import numpy as np
+from pqcutil.sampling import discrete_gaussian
+from . import fft as cfft
+from . import ntt as ring
+
+q = 12289
+
+# NTRU trapdoor generation: small f, g with h = g/f mod q, completed by
+# F, G such that f*G - g*F = q over Z[x]/(x^n + 1) (Falcon's NTRUSolve,
+# recursing through field norms down to n = 1).
+# Exact products use Kronecker substitution on Python integers.
+
+def _pack(a, width):
+    total = 0
+    for c in reversed(a):
+        total = (total << width) + int(c)
+    return total
+
+def _unpack(total, width, count):
+    mask = (1 << width) - 1
+    half = 1 << (width - 1)
+    out = []
+    for _ in range(count):
+        d = total & mask
+        total >>= width
+        if d >= half:
+            d -= 1 << width
+            total += 1
+        out.append(d)
+    return out
+
+def mul_zz(a, b):
+    # exact a*b mod x^n + 1 for integer coefficient lists
+    n = len(a)
+    bound = max(abs(int(c)) for c in a) * max(abs(int(c)) for c in b) * n
+    width = bound.bit_length() + 2
+    prod = _unpack(_pack(a, width) * _pack(b, width), width, 2 * n)
+    return [prod[i] - prod[i + n] for i in range(n)]
+
+def galois_conjugate(a):
+    # a(-x)
+    return [c if i % 2 == 0 else -c for i, c in enumerate(a)]
+
+def field_norm(a):
+    # N(a)(y) = a_even(y)^2 - y*a_odd(y)^2, projected onto Z[y]/(y^(n/2) + 1)
+    even = mul_zz(a[0::2], a[0::2])
+    odd = mul_zz(a[1::2], a[1::2])
+    res = list(even)
+    res[0] += odd[-1]
+    for i in range(len(odd) - 1):
+        res[i + 1] -= odd[i]
+    return res
+
+def lift(a):
+    # a(y) -> a(x^2)
+    res = [0] * (2 * len(a))
+    res[0::2] = a
+    return res
+
+def bitsize(a):
+    return max(abs(int(c)) for c in a).bit_length()
+
+def _adjusted_fft(a, size):
+    # top 53 bits of each coefficient, as floats
+    shift = size - 53
+    return cfft.fft(np.array([float(c >> shift) for c in a]))
+
+def reduce(f, g, F, G):
+    # Babai round-off of (F, G) against (f, g)
+    size = max(53, bitsize(f), bitsize(g))
+    fa = _adjusted_fft(f, size)
+    ga = _adjusted_fft(g, size)
+    den = fa * cfft.adj(fa) + ga * cfft.adj(ga)
+    while True:
+        Size = max(53, bitsize(F), bitsize(G))
+        if Size < size:
+            break
+        Fa = _adjusted_fft(F, Size)
+        Ga = _adjusted_fft(G, Size)
+        num = Fa * cfft.adj(fa) + Ga * cfft.adj(ga)
+        k = [int(round(c)) for c in cfft.ifft(num / den)]
+        if not any(k):
+            break
+        fk = mul_zz(f, k)
+        gk = mul_zz(g, k)
+        shift = Size - size
+        F = [F[i] - (fk[i] << shift) for i in range(len(F))]
+        G = [G[i] - (gk[i] << shift) for i in range(len(G))]
+    return F, G
+
+def xgcd(b, n):
+    x0, x1, y0, y1 = 1, 0, 0, 1
+    while n:
+        quot, b, n = b // n, n, b % n
+        x0, x1 = x1, x0 - quot * x1
+        y0, y1 = y1, y0 - quot * y1
+    return b, x0, y0
+
+def ntru_solve(f, g):
+    if len(f) == 1:
+        d, u, v = xgcd(int(f[0]), int(g[0]))
+        if d != 1:
+            raise ValueError("f and g have a common factor")
+        return [-q * v], [q * u]
+    Fp, Gp = ntru_solve(field_norm(f), field_norm(g))
+    F = mul_zz(lift(Fp), galois_conjugate(g))
+    G = mul_zz(lift(Gp), galois_conjugate(f))
+    return reduce(f, g, F, G)
+
+def gs_norm_squared(f, g):
+    # squared Gram-Schmidt norm of the basis [[g, -f], [G, -F]]
+    f_fft = cfft.fft(f)
+    g_fft = cfft.fft(g)
+    ffgg = f_fft * cfft.adj(f_fft) + g_fft * cfft.adj(g_fft)
+    Ft = cfft.ifft(q * cfft.adj(f_fft) / ffgg)
+    Gt = cfft.ifft(q * cfft.adj(g_fft) / ffgg)
+    return max(float(np.sum(np.square(f)) + np.sum(np.square(g))),
+               float(np.sum(Ft ** 2) + np.sum(Gt ** 2)))
+
+def ntru_gen(n, sample=None):
+    sigma_fg = 1.17 * np.sqrt(q / (2 * n))
+    if sample is None:
+        sample = lambda: discrete_gaussian(sigma_fg, n)
+    while True:
+        f = sample()
+        g = sample()
+        if gs_norm_squared(f, g) > 1.17 ** 2 * q:
+            continue
+        if not ring.is_invertible_ntt(ring.ntt(f)):
+            continue
+        try:
+            F, G = ntru_solve([int(c) for c in f], [int(c) for c in g])
+        except ValueError:
+            continue
+        return f, g, np.array(F, dtype=np.int64), np.array(G, dtype=np.int64)
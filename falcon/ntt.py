@@ -0,0 +1,93 @@
+import numpy as np
+from pqcutil.instrument import timed
+from pqcutil.modarith import Modulus
+
+q = 12289
+generator = 11  # primitive root mod q, q - 1 = 2^12 * 3
+
+# Complete negacyclic NTT over Zq[x]/(x^n + 1) for n a power of two up to
+# 2048 (x^n + 1 splits into linear factors because 2n | q - 1).
+# Falcon uses n = 512 and n = 1024. Tables are built once per n.
+# Butterflies run on int32 lanes with Montgomery twiddles and reduce lazily
+# on tracked bounds (pqcutil.modarith); outputs are in [0, q).
+
+mod = Modulus(q)
+_tables = {}
+
+def bitrev(i, bits):
+    return int(format(i, f"0{bits}b")[::-1], 2) if bits else 0
+
+def tables(n):
+    if n not in _tables:
+        bits = n.bit_length() - 1
+        if n != 1 << bits or (q - 1) % (2 * n):
+            raise ValueError(f"unsupported ring degree n={n}")
+        psi = pow(generator, (q - 1) // (2 * n), q)  # primitive 2n-th root
+        zetas = np.array([pow(psi, bitrev(i, bits), q) for i in range(n)], dtype=np.int64)
+        zetas_inv = np.array([pow(int(z), -1, q) for z in zetas], dtype=np.int64)
+        layers = []
+        z, length = 1, n // 2
+        while length >= 1:
+            layers.append((z, length))
+            z += n // (2 * length)
+            length //= 2
+        _tables[n] = (mod.to_mont(zetas), mod.to_mont(zetas_inv), layers, mod.to_mont(pow(n, -1, q)))
+    return _tables[n]
+
+def _butterflies(out, *args):
+    return out.size * (out.shape[-1].bit_length() - 1)
+
+@timed("falcon.ntt", ops=_butterflies)
+def ntt(a):
+    # a: (..., n) coefficients, lowest degree first
+    a, bound = mod.lanes(a)
+    zetas_mont, _, layers, _ = tables(a.shape[-1])
+    a, bound = mod.forward(a, zetas_mont, layers, bound)
+    return mod.canonical(a, bound, "ntt output")
+
+@timed("falcon.intt", ops=_butterflies)
+def intt(a_hat):
+    a, bound = mod.lanes(a_hat)
+    _, zetas_inv_mont, layers, n_inv_mont = tables(a.shape[-1])
+    a, bound = mod.inverse(a, zetas_inv_mont, layers, bound, n_inv_mont)
+    return mod.canonical(a, bound, "intt output")
+
+@timed("falcon.ring_mul", ops=lambda out, *args: out.size)
+def mul_ntt(a_hat, b_hat):
+    # pointwise product, reduced once; inputs are folded below q first so the
+    # product fits int32
+    a, ba = mod.fold(*mod.lanes(a_hat), q, "mul_ntt input")
+    b, bb = mod.fold(*mod.lanes(b_hat), q, "mul_ntt input")
+    return mod.canonical(a * b, ba * bb, "mul_ntt output")
+
+def mul(a, b):
+    return intt(mul_ntt(ntt(a), ntt(b)))
+
+def add(a, b):
+    return (np.asarray(a, dtype=np.int64) + b) % q
+
+def sub(a, b):
+    return (np.asarray(a, dtype=np.int64) - b) % q
+
+def is_invertible_ntt(a_hat):
+    # a is a unit of Zq[x]/(x^n + 1) iff none of its NTT evaluations is 0
+    return bool(np.all(np.asarray(a_hat) % q != 0, axis=-1).all())
+
+def inv_ntt(a_hat):
+    # pointwise Fermat inverse a^(q-2), square-and-multiply on whole arrays
+    base = np.asarray(a_hat, dtype=np.int64) % q
+    result = np.ones_like(base)
+    e = q - 2
+    while e:
+        if e & 1:
+            result = (result * base) % q
+        base = (base * base) % q
+        e >>= 1
+    return result
+
+def div(a, b):
+    # a / b, or None when b is not invertible
+    b_hat = ntt(b)
+    if not is_invertible_ntt(b_hat):
+        return None
+    return intt(mul_ntt(ntt(a), inv_ntt(b_hat)))
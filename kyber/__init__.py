@@ -0,0 +1,31 @@
+# Simplified CRYSTALS-Kyber over Zq[x]/(x^256 + 1), q = 3329.
+# Nothing is computed on import: the public names below resolve to their
+# submodules on first access, and the demos / attacks only run from
+# `python -m kyber <command>`. The transforms stay in kyber.ntt: a package
+# level `ntt` function would shadow that submodule.
+
+import importlib
+
+_exports = {
+    "Poly": "poly", "PolyVec": "poly", "PolyMat": "poly",
+    "encapsulate_batch": "batch", "decapsulate_batch": "batch",
+    "encode_messages": "batch", "decode_messages": "batch",
+    "PublicKey": "keys", "SecretKey": "keys", "NTTCache": "keys", "generate_keypair": "keys",
+    "expand_matrix_ntt": "expand",
+    "encode_public_key": "serialize", "decode_public_key": "serialize",
+    "encode_secret_key": "serialize", "decode_secret_key": "serialize",
+    "encode_ciphertext": "serialize", "decode_ciphertext": "serialize",
+    "encrypt_stream": "hybrid", "decrypt_stream": "hybrid",
+    "encrypt_file": "hybrid", "decrypt_file": "hybrid",
+    "KeyExchangeServer": "service", "ConnectionPool": "service", "connect": "service",
+    "KeyStore": "keystore",
+}
+
+__all__ = sorted(_exports)
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_exports[name]}", __name__), name)
+    globals()[name] = value
+    return value
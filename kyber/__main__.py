@@ -0,0 +1,31 @@
+import argparse
+import importlib
+import sys
+from pqcutil import instrument
+
+commands = {
+    "demo": ("kyber_256_final", "main", "key generation, encapsulation and decapsulation walkthrough"),
+    "hybrid": ("hybrid", "main", "KEM-DEM encryption round trip of a 64 MiB file with throughput"),
+    "kex-bench": ("service", "main", "asyncio key-exchange server and pooled clients on localhost, latency and throughput"),
+    "keystore-bench": ("keystore", "main", "mmap public-key store of 200000 keys: open, index, lookup cost and resident memory"),
+    "attack-secret": ("kyattack", "main", "lattice attack recovering s from (A, t), n=16 toy ring (a few seconds)"),
+    "attack-sweep": ("kyattack", "sweep_main", "primal attack cost vs number of samples m in a toy ring"),
+    "attack-message": ("final_kyber_attack", "main", "message recovery from v with a large e2"),
+    "attack-message-sweep": ("final_kyber_attack", "sweep_main", "message attack success rates vs scaling factor, threshold and e2 range"),
+    "attack-lstsq": ("attack_kyber", "main", "least-squares recovery of s, n=4 toy ring and n=256 recovery rates"),
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m kyber")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, (_, _, help_text) in commands.items():
+        sub.add_parser(name, help=help_text)
+    args = parser.parse_args(argv)
+    module, entry, _ = commands[args.command]
+    getattr(importlib.import_module(f"kyber.{module}"), entry)()
+    if instrument.enabled:
+        # PQC_PROFILE=1: per-stage counters as JSON lines on stderr
+        instrument.write_jsonl(sys.stderr, {"command": f"kyber {args.command}"})
+
+if __name__ == "__main__":
+    main()
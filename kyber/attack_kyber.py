@@ -4,65 +4,109 @@ import numpy as np
 n = 4    # Polynomial degree (x^4 + 1)
 q = 3329 # Modulus
 
-# Define the secret vector s with small integer coefficients
-s = np.array([1, 2, 0, 1], dtype=int)
-
-# Define multiplication matrices in the ring Zq[x]/(x^4 + 1) as float for least squares
-# M_1: Multiplication by 1 (identity matrix)
-M_1 = np.array([[1, 0, 0, 0],
-                [0, 1, 0, 0],
-                [0, 0, 1, 0],
-                [0, 0, 0, 1]], dtype=float)
-
-# M_x: Multiplication by x (shifts coefficients, x^4 = -1)
-M_x = np.array([[ 0, 0, 0, -1],
-                [ 1, 0, 0,  0],
-                [ 0, 1, 0,  0],
-                [ 0, 0, 1,  0]], dtype=float)
-
-# M_x2: Multiplication by x^200
-M_x2 = np.array([[ 0, 0, -1,  0],
-                 [ 0, 0,  0, -1],
-                 [ 1, 0,  0,  0],
-                 [ 0, 1,  0,  0]], dtype=float)
-
-# M_x3: Multiplication by x^3
-M_x3 = np.array([[ 0, -1,  0,  0],
-                 [ 0,  0, -1,  0],
-                 [ 0,  0,  0, -1],
-                 [ 1,  0,  0,  0]], dtype=float)
-
-# List of multiplication matrices
-matrices = [M_1, M_x, M_x2, M_x3]
-
-# Set random seed for reproducibility
-np.random.seed(42)
-
-# Generate observations
-v_list = []
-for M in matrices:
-    # Generate small noise vector e2 with coefficients in {-1, 0, 1}
-    e2 = np.random.choice([-1, 0, 1], size=n)
-    # Compute v_true = M * s + e2 (as float)
-    v_true = np.dot(M, s.astype(float)) + e2
-    # Apply modular reduction to simulate observed values
-    v_observed = np.mod(v_true, q)
-    # Center v_observed to the range [-q/2, q/2]
-    v_centered = np.where(v_observed > q / 2, v_observed - q, v_observed)
-    v_list.append(v_centered)
-
-# Stack all centered observation vectors into a single 16x1 vector
-v_centered = np.concatenate(v_list)
-
-# Stack all multiplication matrices into a single 16x4 matrix A
-A = np.vstack(matrices)
-
-# Solve for s using least squares method
-s_estimated, residuals, rank, singular = np.linalg.lstsq(A, v_centered, rcond=None)
-# Round the estimated s to the nearest integers
-s_estimated = np.round(s_estimated).astype(int)
-
-# Print the results
-print("Original secret s:", s)
-print("Estimated secret s:", s_estimated)
-print("Attack successful:", np.array_equal(s, s_estimated))
\ No newline at end of file
+# Observations v_i = a_i * s + e_i in Z[x]/(x^n + 1), centred mod q. Each
+# a_i acts as a negacyclic matrix M_i, and least squares solves the normal
+# equations (sum M_i^T M_i) s = sum M_i^T v_i. The twisted FFT
+# (evaluation at the roots of x^n + 1) diagonalises every M_i, and M_i^T
+# becomes the complex conjugate, so the solve is pointwise:
+#     s_hat = sum conj(a_hat_i) v_hat_i / sum |a_hat_i|^2
+# which costs O(m n log n) for m observations instead of a dense O(n^3) solve.
+
+def multiplication_matrix(a):
+    # M[r, c] = a[r - c] for r >= c, -a[n + r - c] otherwise (x^n = -1)
+    a = np.asarray(a)
+    size = a.shape[-1]
+    diff = np.arange(size)[:, None] - np.arange(size)[None, :]
+    return a[..., diff % size] * np.where(diff >= 0, 1, -1)
+
+def _twist(size):
+    return np.exp(1j * np.pi * np.arange(size) / size)
+
+def to_eval(a):
+    # (..., n) coefficients -> values at the roots of x^n + 1
+    a = np.asarray(a, dtype=np.float64)
+    return np.fft.fft(a * _twist(a.shape[-1]), axis=-1)
+
+def from_eval(a_hat):
+    size = a_hat.shape[-1]
+    return (np.fft.ifft(a_hat, axis=-1) * np.conj(_twist(size))).real
+
+def multiply(a, b):
+    # exact for integer inputs while the products stay well inside float precision
+    return np.rint(from_eval(to_eval(a) * to_eval(b))).astype(np.int64)
+
+def centre(x, q=q):
+    x = np.mod(x, q)
+    return np.where(x > q / 2, x - q, x)
+
+def observe(s, a, e, q=q):
+    # a, e: (m, n) stacked multipliers and noise -> (m, n) centred observations
+    return centre(multiply(a, s) + e, q)
+
+def solve_normal_equations(a, v):
+    # least-squares s from v_i = a_i * s + e_i, all m observations at once;
+    # frequencies no multiplier reaches are left at zero
+    a_hat = to_eval(a)
+    v_hat = to_eval(v)
+    num = (np.conj(a_hat) * v_hat).sum(axis=0)
+    den = (np.abs(a_hat) ** 2).sum(axis=0)
+    s_hat = np.divide(num, den, out=np.zeros_like(num), where=den > 1e-9)
+    return from_eval(s_hat)
+
+def random_monomials(n, m):
+    # multipliers +-x^j, the generalisation of the hand-written M_1, M_x, ...
+    a = np.zeros((m, n), dtype=np.int64)
+    a[np.arange(m), np.random.randint(0, n, m)] = np.random.choice([-1, 1], m)
+    return a
+
+def recovery_rate(n, m, noise_levels, trials=20, secret_bound=2, q=q):
+    # fraction of trials recovering s exactly, per uniform noise width |e| <= w
+    rates = {}
+    for w in noise_levels:
+        hits = 0
+        for _ in range(trials):
+            s = np.random.randint(-secret_bound, secret_bound + 1, n)
+            a = random_monomials(n, m)
+            e = np.random.randint(-w, w + 1, (m, n))
+            s_estimated = np.rint(solve_normal_equations(a, observe(s, a, e, q))).astype(int)
+            hits += np.array_equal(s, s_estimated)
+        rates[w] = hits / trials
+    return rates
+
+def main():
+    # Define the secret vector s with small integer coefficients
+    s = np.array([1, 2, 0, 1], dtype=int)
+
+    # Multipliers 1, x, x^2, x^3 in the ring Zq[x]/(x^4 + 1)
+    multipliers = np.eye(n, dtype=int)
+
+    # Set random seed for reproducibility
+    np.random.seed(42)
+
+    # Generate observations: small noise e2 with coefficients in {-1, 0, 1}
+    e2 = np.random.choice([-1, 0, 1], size=(len(multipliers), n))
+    v_centered = observe(s, multipliers, e2)
+
+    # Solve for s with the FFT-diagonalised normal equations, and with a dense
+    # least-squares solve over the stacked 16x4 matrix for comparison
+    s_estimated = np.round(solve_normal_equations(multipliers, v_centered)).astype(int)
+    A = np.vstack(multiplication_matrix(multipliers))
+    s_dense = np.round(np.linalg.lstsq(A, v_centered.ravel().astype(float), rcond=None)[0]).astype(int)
+
+    # Print the results
+    print("Original secret s:", s)
+    print("Estimated secret s:", s_estimated)
+    print("Dense least squares agrees:", np.array_equal(s_estimated, s_dense))
+    print("Attack successful:", np.array_equal(s, s_estimated))
+
+    # Recovery rate at Kyber's ring size as the noise grows
+    big_n = 256
+    levels = [1, 2, 4, 8]
+    print(f"\nRecovery rate, n = {big_n}, |s| <= 2, |e| <= w:")
+    print("     m " + "".join(f"{f'w = {w}':>9}" for w in levels))
+    for m in (16, 64, 256, 1024):
+        rates = recovery_rate(big_n, m, levels)
+        print(f"{m:>6} " + "".join(f"{rates[w]:>9.2f}" for w in levels))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import numpy as np
+from pqcutil.instrument import timed
+from pqcutil.sampling import cbd
+from .ntt import n, q, ntt, intt, matrix_vector_ntt, inner_product_ntt
+
+# Batched encapsulation / decapsulation: one call handles a whole stack of
+# sessions under the same public A, t (or secret s). A and t are moved to
+# the NTT domain once per call and broadcast over the batch axis.
+
+message_scale = 1337
+decode_low, decode_high = 832, 2496  # w in this window decodes to 1
+chunk_size = 1024  # sessions per vectorised pass, bounds the int64 temporaries
+
+def _coeffs(x):
+    return np.asarray(getattr(x, "coeffs", x))
+
+def noise_parameters(k):
+    # (eta1, eta2) of the centred binomial noise, as in Kyber
+    return (3, 2) if k == 2 else (2, 2)
+
+def generate_randomness(batch, k, pool=None):
+    eta1, eta2 = noise_parameters(k)
+    r = cbd(eta1, (batch, k, n), pool) % q
+    e1 = cbd(eta2, (batch, k, n), pool) % q
+    e2 = cbd(eta2, (batch, n), pool) % q
+    return r, e1, e2
+
+@timed("kyber.encode", ops=lambda out, *args, **kwargs: out.size)
+def encode_messages(bits):
+    return (np.asarray(bits, dtype=np.int16) * message_scale) % q
+
+@timed("kyber.decode", ops=lambda out, *args, **kwargs: out.size)
+def decode_messages(w):
+    w = np.asarray(w)
+    return ((w >= decode_low) & (w <= decode_high)).astype(np.uint8)
+
+@timed("kyber.encapsulate")
+def encapsulate_ntt(At_hat, t_hat, messages, r=None, e1=None, e2=None):
+    # At_hat: NTT of A^T (k, k, n), t_hat: NTT of t (k, n)
+    # messages: (batch, n) encoded message polynomials
+    # r, e1: (batch, k, n), e2: (batch, n); each one not given is drawn here
+    # returns u: (batch, k, n), v: (batch, n)
+    messages = _coeffs(messages)
+    batch = messages.shape[0]
+    k = t_hat.shape[0]
+    eta1, eta2 = noise_parameters(k)
+    r = cbd(eta1, (batch, k, n)) % q if r is None else r
+    e1 = cbd(eta2, (batch, k, n)) % q if e1 is None else e1
+    e2 = cbd(eta2, (batch, n)) % q if e2 is None else e2
+    u = np.empty((batch, k, n), dtype=np.int16)
+    v = np.empty((batch, n), dtype=np.int16)
+    for lo in range(0, batch, chunk_size):
+        hi = min(lo + chunk_size, batch)
+        r_hat = ntt(r[lo:hi])
+        u[lo:hi] = (intt(matrix_vector_ntt(At_hat, r_hat)) + e1[lo:hi]) % q
+        v[lo:hi] = (intt(inner_product_ntt(t_hat, r_hat)) + e2[lo:hi] + messages[lo:hi]) % q
+    return u, v
+
+@timed("kyber.decapsulate")
+def decapsulate_ntt(s_hat, u, v):
+    # s_hat: NTT of s (k, n), u: (batch, k, n), v: (batch, n) -> bits (batch, n)
+    u = _coeffs(u)
+    v = _coeffs(v)
+    bits = np.empty(v.shape, dtype=np.uint8)
+    for lo in range(0, v.shape[0], chunk_size):
+        hi = min(lo + chunk_size, v.shape[0])
+        w = (v[lo:hi] - intt(inner_product_ntt(s_hat, ntt(u[lo:hi])))) % q
+        bits[lo:hi] = decode_messages(w)
+    return bits
+
+def encapsulate_batch(A, t, messages, r=None, e1=None, e2=None):
+    # A: PolyMat (k, k, n), t: PolyVec (k, n), transformed once per call
+    At_hat = ntt(_coeffs(A).transpose(1, 0, 2))  # u = A^T.r + e1
+    return encapsulate_ntt(At_hat, ntt(_coeffs(t)), messages, r, e1, e2)
+
+def decapsulate_batch(s, u, v):
+    return decapsulate_ntt(ntt(_coeffs(s)), u, v)
@@ -0,0 +1,37 @@
+import hashlib
+import numpy as np
+from .ntt import n, q
+
+# Public matrix A expanded from a 32-byte seed rho, as in Kyber:
+# A_hat[i][j] = Parse(SHAKE-128(rho || j || i)). The XOF output is read as
+# 12-bit candidates and rejection sampled into [0, q); the coefficients are
+# taken to be in the NTT domain directly, so no forward transform is needed.
+
+seed_bytes = 32
+_xof_block = 168  # SHAKE-128 rate
+
+def parse(buf):
+    # bytes -> accepted 12-bit candidates < q, in stream order
+    b = np.frombuffer(buf, dtype=np.uint8)[:len(buf) // 3 * 3].astype(np.uint16).reshape(-1, 3)
+    d1 = b[:, 0] | ((b[:, 1] & 0x0F) << 8)
+    d2 = (b[:, 1] >> 4) | (b[:, 2] << 4)
+    d = np.stack((d1, d2), axis=-1).reshape(-1)
+    return d[d < q]
+
+def sample_ntt(rho, i, j):
+    xof = hashlib.shake_128(bytes(rho) + bytes([j, i]))
+    length = 3 * _xof_block  # 336 candidates, short of n in under 1% of draws
+    while True:
+        coeffs = parse(xof.digest(length))
+        if len(coeffs) >= n:
+            return coeffs[:n].astype(np.int16)
+        length += _xof_block
+
+def expand_matrix_ntt(rho, k):
+    if len(rho) != seed_bytes:
+        raise ValueError(f"seed must be {seed_bytes} bytes, got {len(rho)}")
+    A_hat = np.empty((k, k, n), dtype=np.int16)
+    for i in range(k):
+        for j in range(k):
+            A_hat[i, j] = sample_ntt(rho, i, j)
+    return A_hat
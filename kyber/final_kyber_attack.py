@@ -1,4 +1,7 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+from .ntt import ntt, intt, matrix_vector_ntt, inner_product_ntt
 
 # Parameters
 n = 256  # Polynomial degree
@@ -47,18 +50,16 @@ def generate_vector(name):
     return vec
 
 def multiply_polynomials(a, b):
+    # accumulate exact products, reduce each coefficient once at the end
     result = {}
     for key1, value1 in a.items():
         for key2, value2 in b.items():
             new_key = (key1 + key2) % n
-            new_val = (value1 * value2) % q
+            new_val = int(value1) * int(value2)
             if key1 + key2 >= n:
-                new_val = (-new_val) % q
-            if new_key in result:
-                result[new_key] = (result[new_key] + new_val) % q
-            else:
-                result[new_key] = new_val
-    return result
+                new_val = -new_val
+            result[new_key] = result.get(new_key, 0) + new_val
+    return {key: value % q for key, value in result.items()}
 
 def add_polynomials(a, b):
     result = a.copy()
@@ -119,38 +120,129 @@ def attack_message(v, scaling_factor=1337, threshold=100):
             recovered_message[key] = 0
     return recovered_message
 
+# Monte-Carlo Harness
+#
+# Instances are drawn with the same distributions as generate_matrix,
+# generate_vector and encapsulate above, but as (batch, ...) arrays, and the
+# attack runs on the whole batch at once. Chunks of trials go to a process
+# pool; each chunk gets its own seed from one SeedSequence, so a run is
+# reproducible for a given seed whatever the worker count.
+
+def sparse_ternary(rng, shape, low=5, high=10):
+    # generate_vector: low..high-1 positions per polynomial, values from {1, 0, -1}
+    weight = rng.integers(low, high, shape[:-1])[..., None]
+    rank = np.argsort(rng.random(shape), axis=-1).argsort(axis=-1)
+    return np.where(rank < weight, rng.choice([1, 0, -1], shape), 0)
+
+def sample_instances(count, e2_range=(100, 3000), message_scale=1337, rng=None):
+    # -> v (count, n) and the message support (count, n) bool
+    rng = np.random.default_rng() if rng is None else rng
+    A = np.zeros((count, k, k, n), dtype=np.int64)
+    weight = rng.integers(9, 15, (count, k, k))[..., None]
+    rank = np.argsort(rng.random(A.shape), axis=-1).argsort(axis=-1)
+    A = np.where(rank < weight, rng.integers(1, 100, A.shape), 0)
+    s, e, r = (sparse_ternary(rng, (count, k, n)) for _ in range(3))
+    t_hat = (matrix_vector_ntt(ntt(A), ntt(s)) + ntt(e)) % q
+    v = intt(inner_product_ntt(t_hat, ntt(r)))
+    rows = np.arange(count)
+    v[rows, rng.integers(0, n, count)] += rng.integers(e2_range[0], e2_range[1], count)
+    sizes = rng.integers(1, 10, count)[:, None]
+    support = np.argsort(rng.random((count, n)), axis=-1).argsort(axis=-1) < sizes
+    v = (v + support * message_scale) % q
+    return v, support
+
+def attack_message_batch(v, scaling_factor=1337, threshold=100):
+    # attack_message on (..., n) coefficient arrays: recovered multiples, 0 where rejected
+    v = np.asarray(v, dtype=np.int64)
+    multiple = np.rint(v / scaling_factor).astype(np.int64)
+    return np.where(np.abs(v - multiple * scaling_factor) < threshold, multiple, 0)
+
+def _trial_chunk(count, e2_range, scaling_factors, thresholds, seed):
+    # exact-recovery and wrong-coefficient counts, shape (len(scaling_factors), len(thresholds))
+    v, support = sample_instances(count, e2_range, rng=np.random.default_rng(seed))
+    successes = np.zeros((len(scaling_factors), len(thresholds)), dtype=np.int64)
+    errors = np.zeros_like(successes)
+    for i, sf in enumerate(scaling_factors):
+        for j, th in enumerate(thresholds):
+            wrong = (attack_message_batch(v, sf, th) != 0) != support
+            successes[i, j] = (~wrong.any(axis=-1)).sum()
+            errors[i, j] = wrong.sum()
+    return successes, errors
+
+def monte_carlo(trials=10000, scaling_factors=(1337,), thresholds=(100,), e2_ranges=((100, 3000),),
+                workers=None, chunk_size=1000, seed=None):
+    # success-rate statistics for every (e2 range, scaling_factor, threshold)
+    workers = workers or os.cpu_count() or 1
+    chunks = [min(chunk_size, trials - lo) for lo in range(0, trials, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(e2_ranges) * len(chunks))
+    jobs = [(count, e2, scaling_factors, thresholds, seeds[i * len(chunks) + c])
+            for i, e2 in enumerate(e2_ranges) for c, count in enumerate(chunks)]
+    if workers == 1:
+        parts = [_trial_chunk(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            parts = list(pool.map(_trial_chunk, *zip(*jobs)))
+
+    results = []
+    for i, e2 in enumerate(e2_ranges):
+        successes = sum(p[0] for p in parts[i * len(chunks):(i + 1) * len(chunks)])
+        errors = sum(p[1] for p in parts[i * len(chunks):(i + 1) * len(chunks)])
+        for a, sf in enumerate(scaling_factors):
+            for b, th in enumerate(thresholds):
+                rate = successes[a, b] / trials
+                results.append({
+                    "e2_range": tuple(e2), "scaling_factor": sf, "threshold": th, "trials": trials,
+                    "success_rate": float(rate),
+                    "stderr": float(np.sqrt(rate * (1 - rate) / trials)),  # binomial standard error
+                    "coefficient_error_rate": float(errors[a, b] / (trials * n)),
+                })
+    return results
+
+def sweep_main(trials=10000, workers=None):
+    results = monte_carlo(trials, scaling_factors=(1300, 1337, 1400), thresholds=(50, 100, 200, 400),
+                          e2_ranges=((0, 100), (100, 3000), (1000, 3000)), workers=workers)
+    print(f"{'e2 range':>12} {'scale':>6} {'thresh':>6} {'success':>8} {'+-':>6} {'coef err':>9}")
+    for r in results:
+        print(f"{str(r['e2_range']):>12} {r['scaling_factor']:>6} {r['threshold']:>6} "
+              f"{r['success_rate']:>8.4f} {r['stderr']:>6.4f} {r['coefficient_error_rate']:>9.5f}")
+    return results
+
 # Main Execution
-print("=== Key Generation ===")
-A = generate_matrix()
-s = generate_vector("s")  # Secret key
-e = generate_vector("e")
-t = generate_public_key(A, s, e)  # Public key
-
-print("=== Encryption ===")
-message = {}
-element_size = np.random.randint(1, 10)
-power_list = np.random.choice(range(0, n), element_size, replace=False)
-for j in range(element_size):
-    message[power_list[j]] = 1  # Message bits are 1
-for key in message:
-    message[key] = (message[key] * 1337) % q  # Scale message
-
-u, v = encapsulate(A, t, message)
-
-print("=== Simple Attack to Recover Message ===")
-recovered_message = attack_message(v)
-print("Recovered Message (coefficients: 1 or 0):")
-string = ""
-for key, value in sorted(recovered_message.items(), reverse=True):
-    if value != 0:
-        string += f"x^{key} + "
-print(string[:-3] if string else "0")
-print()
-print_vector([message],"message")
-# Compare with original
-original_powers = sorted([key for key, val in message.items() if val != 0], reverse=True)
-recovered_powers = sorted([key for key, val in recovered_message.items() if val != 0], reverse=True)
-original_powers = list(map(str , original_powers))
-recovered_powers = list(map(str , recovered_powers))
-print("Original Message Powers:", original_powers)
-print("Recovered Message Powers:", recovered_powers)
\ No newline at end of file
+def main():
+    print("=== Key Generation ===")
+    A = generate_matrix()
+    s = generate_vector("s")  # Secret key
+    e = generate_vector("e")
+    t = generate_public_key(A, s, e)  # Public key
+
+    print("=== Encryption ===")
+    message = {}
+    element_size = np.random.randint(1, 10)
+    power_list = np.random.choice(range(0, n), element_size, replace=False)
+    for j in range(element_size):
+        message[power_list[j]] = 1  # Message bits are 1
+    for key in message:
+        message[key] = (message[key] * 1337) % q  # Scale message
+
+    u, v = encapsulate(A, t, message)
+
+    print("=== Simple Attack to Recover Message ===")
+    recovered_message = attack_message(v)
+    print("Recovered Message (coefficients: 1 or 0):")
+    string = ""
+    for key, value in sorted(recovered_message.items(), reverse=True):
+        if value != 0:
+            string += f"x^{key} + "
+    print(string[:-3] if string else "0")
+    print()
+    print_vector([message],"message")
+    # Compare with original
+    original_powers = sorted([key for key, val in message.items() if val != 0], reverse=True)
+    recovered_powers = sorted([key for key, val in recovered_message.items() if val != 0], reverse=True)
+    original_powers = list(map(str , original_powers))
+    recovered_powers = list(map(str , recovered_powers))
+    print("Original Message Powers:", original_powers)
+    print("Recovered Message Powers:", recovered_powers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import os
+import uuid
+from collections import OrderedDict
+import numpy as np
+from .ntt import n, q, ntt, intt, matrix_vector_ntt
+from .poly import PolyVec, PolyMat
+from pqcutil.sampling import cbd
+from .batch import encapsulate_ntt, decapsulate_ntt, noise_parameters
+from .expand import seed_bytes, expand_matrix_ntt
+
+# Key objects that keep their NTT-domain form (A^T hat, t hat, s hat) so
+# repeated encapsulations / decapsulations skip the forward transforms.
+#
+# Where the transforms live is the memory / latency trade-off:
+#   cache=None       kept on the key itself (fastest, grows with the key)
+#   cache=NTTCache() kept in a shared LRU of bounded size, evicted entries
+#                    are recomputed on their next use
+#   cache=False      never kept (least memory, transforms on every call)
+#
+# Keys made from a seed carry only rho and t; A_hat is expanded from rho
+# on demand and shared through matrix_cache, keyed by (rho, k).
+
+class NTTCache:
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key, compute):
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            value = self._entries[key] = compute()
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return value
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def discard(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def nbytes(self):
+        return sum(sum(a.nbytes for a in value) for value in self._entries.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+matrix_cache = NTTCache(maxsize=64)
+
+class _CachedKey:
+    def __init__(self, cache):
+        self.cache = cache
+        self._id = uuid.uuid4().bytes  # unique across processes, unlike a counter
+        self._hat = None
+
+    def _transforms(self):
+        if self.cache is False:
+            return self._compute()
+        if self.cache is None:
+            if self._hat is None:
+                self._hat = self._compute()
+            return self._hat
+        return self.cache.get(self._id, self._compute)
+
+    def drop_cache(self):
+        self._hat = None
+        if self.cache:
+            self.cache.discard(self._id)
+
+class PublicKey(_CachedKey):
+    def __init__(self, A, t, cache=None, seed=None):
+        super().__init__(cache)
+        self._A = A
+        self.t = t
+        self.seed = seed
+
+    @classmethod
+    def from_seed(cls, seed, t, cache=None):
+        return cls(None, t, cache, seed=bytes(seed))
+
+    @property
+    def k(self):
+        return self.t.shape[0]
+
+    @property
+    def A_hat(self):
+        if self.seed is None:
+            return ntt(self._A.coeffs)
+        return matrix_cache.get((self.seed, self.k), lambda: (expand_matrix_ntt(self.seed, self.k),))[0]
+
+    @property
+    def A(self):
+        if self._A is None:
+            return PolyMat(intt(self.A_hat))
+        return self._A
+
+    def _compute(self):
+        if self.seed is None:
+            return ntt(self._A.coeffs.transpose(1, 0, 2)), ntt(self.t.coeffs)
+        return self.A_hat.transpose(1, 0, 2), ntt(self.t.coeffs)
+
+    @property
+    def At_hat(self):
+        return self._transforms()[0]
+
+    @property
+    def t_hat(self):
+        return self._transforms()[1]
+
+    def encapsulate(self, messages, r=None, e1=None, e2=None):
+        # messages: (batch, n) or a single (n,) encoded message
+        messages = np.asarray(getattr(messages, "coeffs", messages))
+        single = messages.ndim == 1
+        At_hat, t_hat = self._transforms()
+        u, v = encapsulate_ntt(At_hat, t_hat, messages[None] if single else messages, r, e1, e2)
+        return (u[0], v[0]) if single else (u, v)
+
+class SecretKey(_CachedKey):
+    def __init__(self, s, cache=None):
+        super().__init__(cache)
+        self.s = s
+
+    def _compute(self):
+        return (ntt(self.s.coeffs),)
+
+    @property
+    def s_hat(self):
+        return self._transforms()[0]
+
+    def decapsulate(self, u, v):
+        u = np.asarray(getattr(u, "coeffs", u))
+        v = np.asarray(getattr(v, "coeffs", v))
+        if v.ndim == 1:
+            return decapsulate_ntt(self.s_hat, u[None], v[None])[0]
+        return decapsulate_ntt(self.s_hat, u, v)
+
+def generate_keypair(k=2, seed=None, cache=None):
+    # t = A.s + e with A expanded from the public seed rho
+    rho = os.urandom(seed_bytes) if seed is None else bytes(seed)
+    A_hat = expand_matrix_ntt(rho, k)
+    eta1, _ = noise_parameters(k)
+    s = cbd(eta1, (k, n)) % q
+    e = cbd(eta1, (k, n)) % q
+    t = (intt(matrix_vector_ntt(A_hat, ntt(s))) + e) % q
+    matrix_cache.get((rho, k), lambda: (A_hat,))
+    return PublicKey.from_seed(rho, PolyVec(t), cache), SecretKey(PolyVec(s), cache)
@@ -0,0 +1,270 @@
+import hashlib
+import mmap
+import os
+import time
+from collections import OrderedDict
+import numpy as np
+from .serialize import decode_public_key, encode_public_key, public_key_bytes
+
+try:
+    import fcntl
+except ImportError:  # Windows: one writer per store
+    fcntl = None
+
+# On-disk store of Kyber public keys, read through mmap. Two files:
+#     path        header (magic || k || 2 reserved bytes), then fixed-stride
+#                 records, each an encoded public key (12-bit packed t || rho)
+#     path.ids    one 32-byte key ID per record, in the same order
+# Record i is the i-th complete ID, so an append writes its key record
+# first and its ID second, each fsynced before the next step: a crash or
+# power loss in between leaves an orphan key that the next append truncates
+# away, and readers never see a partial record.
+#
+# Opening maps both files and reads nothing. The ID index (sorted 64-bit ID
+# prefixes) is built on the first lookup from the .ids file alone, 8 bytes
+# of memory per key; records appended later are found through a small dict
+# until the next rebuild. Key records are only paged in when looked up, so
+# resident memory follows the keys in use. view() returns the packed record
+# as a read-only array over the mapping (no copy), get() decodes it into a
+# PublicKey, keeping the most recently used ones with their NTT transforms.
+# An ID appended twice resolves to its first record.
+
+magic = b"KYPK\x01"
+header_bytes = 8
+id_bytes = 32
+
+def key_id(pk_bytes):
+    # default ID of an encoded public key
+    return hashlib.sha3_256(pk_bytes).digest()
+
+def _as_id(kid):
+    kid = kid.encode() if isinstance(kid, str) else bytes(kid)
+    if len(kid) > id_bytes:
+        raise ValueError(f"key ID longer than {id_bytes} bytes")
+    return kid.ljust(id_bytes, b"\0")
+
+def _prefix(ids):
+    # (..., 32) uint8 IDs -> their first 8 bytes as big-endian uint64, which sort like the IDs
+    return np.ascontiguousarray(ids[..., :8]).view(">u8")[..., 0].astype(np.uint64)
+
+class KeyStore:
+    def __init__(self, path, k=None, cache_size=1024):
+        # opens path, creating it for k if it does not exist yet
+        self.path = os.fspath(path)
+        self.cache_size = cache_size
+        if not os.path.exists(self.path):
+            if k is None:
+                raise FileNotFoundError(f"{self.path} does not exist and no k was given to create it")
+            with open(self.path, "xb") as f:
+                f.write(magic + bytes([k, 0, 0]))
+            open(self.path + ".ids", "ab").close()
+        self._data = open(self.path, "r+b")
+        self._ids = open(self.path + ".ids", "r+b")
+        header = self._data.read(header_bytes)
+        if header[:len(magic)] != magic:
+            raise ValueError(f"{self.path} is not a public-key store")
+        self.k = header[len(magic)]
+        if k is not None and k != self.k:
+            raise ValueError(f"{self.path} holds k={self.k} keys, not k={k}")
+        self.stride = public_key_bytes(self.k)
+        self._keys = OrderedDict()
+        self._data_map = self._id_map = None
+        self._records = self._id_rows = None
+        self._count = 0
+        self._prefixes = np.empty(0, dtype=np.uint64)
+        self._order = np.empty(0, dtype=np.int64)
+        self._indexed = 0
+        self._scanned = 0
+        self._recent = {}
+        self.refresh()
+
+    def refresh(self):
+        # pick up records appended since the last call (by this or another process)
+        count = os.fstat(self._ids.fileno()).st_size // id_bytes
+        if count != self._count:
+            self._count = count
+            self._remap()
+
+    def _remap(self):
+        # the old maps are not closed here: views handed out earlier keep them
+        # alive, and they are unmapped once the last view goes
+        self._records = np.empty((0, self.stride), dtype=np.uint8)
+        self._id_rows = np.empty((0, id_bytes), dtype=np.uint8)
+        if self._count:
+            self._data_map = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+            self._id_map = mmap.mmap(self._ids.fileno(), 0, access=mmap.ACCESS_READ)
+            self._records = np.frombuffer(self._data_map, dtype=np.uint8, count=self._count * self.stride,
+                                          offset=header_bytes).reshape(self._count, self.stride)
+            self._id_rows = np.frombuffer(self._id_map, dtype=np.uint8,
+                                          count=self._count * id_bytes).reshape(self._count, id_bytes)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, kid):
+        return self.find(kid) is not None
+
+    def _index(self):
+        # sorted prefixes for records [0, indexed), a dict for the rest; rebuilt
+        # once the dict grows past an eighth of the store
+        unindexed = self._count - self._indexed
+        if unindexed > 1024 + self._indexed // 8:
+            prefixes = _prefix(self._id_rows)
+            self._order = np.argsort(prefixes, kind="stable")
+            self._prefixes = prefixes[self._order]
+            self._indexed = self._scanned = self._count
+            self._recent = {}
+        else:
+            for i in range(self._scanned, self._count):
+                self._recent.setdefault(self._id_rows[i].tobytes(), i)
+            self._scanned = self._count
+
+    def find(self, kid):
+        # record number of a key ID, or None; a miss first checks for new appends
+        kid = _as_id(kid)
+        i = self._find(kid)
+        if i is None and os.fstat(self._ids.fileno()).st_size // id_bytes != self._count:
+            self.refresh()
+            i = self._find(kid)
+        return i
+
+    def _find(self, kid):
+        self._index()
+        prefix = np.uint64(int.from_bytes(kid[:8], "big"))
+        lo = np.searchsorted(self._prefixes, prefix, side="left")
+        hi = np.searchsorted(self._prefixes, prefix, side="right")
+        for i in self._order[lo:hi]:
+            if self._id_rows[i].tobytes() == kid:
+                return int(i)
+        return self._recent.get(kid)
+
+    def view(self, kid):
+        # packed public key as a read-only uint8 array over the mapping
+        i = self.find(kid)
+        if i is None:
+            raise KeyError(kid)
+        return self._records[i]
+
+    def get(self, kid):
+        kid = _as_id(kid)
+        if kid in self._keys:
+            self._keys.move_to_end(kid)
+            return self._keys[kid]
+        pk = decode_public_key(self.view(kid), self.k)
+        self._keys[kid] = pk
+        if len(self._keys) > self.cache_size:
+            self._keys.popitem(last=False)
+        return pk
+
+    def append(self, pk, kid=None):
+        # pk: PublicKey or its encoding -> the key ID it was stored under
+        return self.extend([pk], None if kid is None else [kid])[0]
+
+    def extend(self, pks, kids=None):
+        # appends many keys with one write per file; the batch becomes
+        # visible at once when its IDs land
+        blobs = [pk if isinstance(pk, (bytes, bytearray, memoryview)) else encode_public_key(pk) for pk in pks]
+        for blob in blobs:
+            if len(blob) != self.stride:
+                raise ValueError(f"public key must be {self.stride} bytes for k={self.k}, got {len(blob)}")
+        kids = [key_id(blob) for blob in blobs] if kids is None else [_as_id(kid) for kid in kids]
+        if len(kids) != len(blobs):
+            raise ValueError(f"{len(kids)} key IDs for {len(blobs)} keys")
+        if fcntl is not None:
+            fcntl.flock(self._ids.fileno(), fcntl.LOCK_EX)
+        try:
+            # drop a torn ID and any orphan key records left by an interrupted append
+            count = os.fstat(self._ids.fileno()).st_size // id_bytes
+            self._ids.truncate(count * id_bytes)
+            self._data.truncate(header_bytes + count * self.stride)
+            self._data.seek(0, os.SEEK_END)
+            self._data.write(b"".join(blobs))
+            self._data.flush()
+            os.fsync(self._data.fileno())  # records durable before the IDs that commit them
+            self._ids.seek(0, os.SEEK_END)
+            self._ids.write(b"".join(kids))
+            self._ids.flush()
+            os.fsync(self._ids.fileno())
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._ids.fileno(), fcntl.LOCK_UN)
+        self.refresh()
+        return kids
+
+    def close(self):
+        self._records = self._id_rows = None
+        self._keys.clear()
+        for m in (self._data_map, self._id_map):
+            try:
+                if m is not None:
+                    m.close()
+            except BufferError:
+                pass  # a view is still in use, unmapped when it is freed
+        self._data_map = self._id_map = None
+        self._data.close()
+        self._ids.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _resident_kib():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def main(count=200000, lookups=1000, k=2):
+    # builds a store of count random key records (uniform t < q and a random
+    # seed: canonical encodings, not from keygen), reopens it and looks up /
+    # encapsulates to a few of them
+    import tempfile
+    from .batch import encode_messages
+    from .expand import seed_bytes
+    from .ntt import n, q
+    from .serialize import pack, secret_key_bytes
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "keys")
+        start = time.perf_counter()
+        with KeyStore(path, k) as store:
+            for lo in range(0, count, 10000):
+                t = pack(np.random.randint(0, q, (min(10000, count - lo), k, n)), 12).reshape(-1, secret_key_bytes(k))
+                store.extend([row.tobytes() + os.urandom(seed_bytes) for row in t])
+        print(f"{count} keys appended in {time.perf_counter() - start:.2f} s, "
+              f"{os.path.getsize(path) / 2 ** 20:.1f} MiB + {os.path.getsize(path + '.ids') / 2 ** 20:.1f} MiB of IDs")
+
+        with open(path + ".ids", "rb") as f:
+            ids = [f.read(id_bytes) for _ in range(lookups)]
+        rss = _resident_kib()
+        start = time.perf_counter()
+        store = KeyStore(path)
+        opened = time.perf_counter() - start
+        start = time.perf_counter()
+        store.find(ids[0])
+        indexed = time.perf_counter() - start
+        start = time.perf_counter()
+        for kid in ids:
+            store.view(kid)
+        viewed = (time.perf_counter() - start) / lookups
+        message = encode_messages(np.random.randint(0, 2, 256))
+        start = time.perf_counter()
+        for kid in ids[:100]:
+            store.get(kid).encapsulate(message)
+        encapsulated = (time.perf_counter() - start) / 100
+        grown = None if rss is None else _resident_kib() - rss
+        store.close()
+
+    print(f"open {opened * 1e3:.2f} ms, index build on first lookup {indexed * 1e3:.1f} ms")
+    print(f"view {viewed * 1e6:.1f} us, get + encapsulate {encapsulated * 1e3:.2f} ms")
+    if grown is not None:
+        print(f"resident memory grew by {grown / 1024:.1f} MiB for {lookups} keys used out of {count}")
+
+if __name__ == "__main__":
+    main()
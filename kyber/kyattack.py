@@ -1,5 +1,4 @@
 import numpy as np
-from sage.all import Matrix, ZZ, vector  # Requires SageMath
 
 # Parameters
 n = 256
@@ -59,19 +58,17 @@ def generate_vector(name):
     return vec
 
 def multiply_polynomials(a, b):
+    # accumulate exact products, reduce each coefficient once at the end
     result = {}
     for key1, value1 in a.items():
         for key2, value2 in b.items():
             new_key = key1 + key2
-            new_val = (value1 * value2) % q
+            new_val = int(value1) * int(value2)
             if new_key >= n:
                 new_key %= n
-                new_val = (-new_val) % q
-            if new_key in result:
-                result[new_key] = (result[new_key] + new_val) % q
-            else:
-                result[new_key] = new_val
-    return result
+                new_val = -new_val
+            result[new_key] = result.get(new_key, 0) + new_val
+    return {key: value % q for key, value in result.items()}
 
 def add_polynomials(a, b):
     result = a.copy()
@@ -152,93 +149,246 @@ def decapsulate(A, t, e, s, u, v, message):
 # --- Attack Functions ---
 
 def poly_to_coeffs(poly, n):
-    coeffs = [0] * n
-    for power, coeff in poly.items():
-        coeffs[power] = coeff % q
-    return coeffs
+    coeffs = np.zeros(n, dtype=np.int64)
+    if poly:
+        powers = np.fromiter(poly.keys(), dtype=np.int64, count=len(poly))
+        values = np.fromiter(poly.values(), dtype=np.int64, count=len(poly))
+        np.add.at(coeffs, powers, values)
+    return coeffs % q
+
+def negacyclic_matrices(coeffs, q):
+    # coeffs: (..., n) -> (..., n, n) matrices of multiplication in Zq[x]/(x^n + 1):
+    # M[r, m] = c[r - m] for r >= m and -c[n + r - m] otherwise (x^n = -1)
+    n = coeffs.shape[-1]
+    r = np.arange(n)
+    diff = r[:, None] - r[None, :]
+    sign = np.where(diff >= 0, 1, -1).astype(np.int8)
+    dtype = np.int16 if q < 2 ** 15 else np.int64
+    return ((coeffs[..., diff % n] * sign) % q).astype(dtype)
 
 def matrix_A_to_coeff_matrix(A, n, q):
-    M = np.zeros((k * n, k * n), dtype=int)
+    # block (i, j) multiplies s_j into t_i; blocks are gathered one at a time
+    # straight into the int16 result, so the only temporary is one n x n block
+    k = len(A)
+    M = np.empty((k * n, k * n), dtype=np.int16 if q < 2 ** 15 else np.int64)
     for i in range(k):
         for j in range(k):
-            poly = A[i][j]
-            coeffs = poly_to_coeffs(poly, n)
-            for l in range(n):
-                for m in range(n):
-                    target = (l + m) % n
-                    sign = -1 if (l + m) >= n else 1  # x^n = -1
-                    M[i * n + target, j * n + m] = (M[i * n + target, j * n + m] + sign * coeffs[l]) % q
+            M[i * n:(i + 1) * n, j * n:(j + 1) * n] = negacyclic_matrices(poly_to_coeffs(A[i][j], n), q)
     return M
 
 def vector_to_coeffs(t, n):
-    coeffs = []
-    for i in range(k):
-        coeffs.extend(poly_to_coeffs(t[i], n))
-    return coeffs
+    return np.concatenate([poly_to_coeffs(element, n) for element in t])
 
-def attack_secret_vector(A, t):
-    M_A = matrix_A_to_coeff_matrix(A, n, q)
-    t_coeffs = vector_to_coeffs(t, n)
+def embedding_basis(M_A, q):
+    # [[q I, 0], [M_A, I]], assembled with block writes into one array
+    kn = M_A.shape[0]
+    dtype = np.int16 if q < 2 ** 15 else np.int64
+    B = np.zeros((2 * kn, 2 * kn), dtype=dtype)
+    B[np.arange(kn), np.arange(kn)] = q
+    B[kn:, :kn] = M_A
+    B[np.arange(kn, 2 * kn), np.arange(kn, 2 * kn)] = 1
+    return B
 
-    dim = 2 * k * n  # 1024
-    B = Matrix(ZZ, dim, dim)
-    
-    for i in range(k * n):
-        B[i, i] = q
-    
-    for i in range(k * n):
-        for j in range(k * n):
-            B[k * n + i, j] = M_A[i, j]
-    
-    for i in range(k * n):
-        B[k * n + i, k * n + i] = 1
+def solve_mod(M, b, q):
+    # x with M x = b (mod q), q prime; Gauss-Jordan on [M | b], None if M is singular
+    size = M.shape[0]
+    aug = np.concatenate((np.asarray(M, dtype=np.int64) % q, (np.asarray(b, dtype=np.int64) % q)[:, None]), axis=1)
+    for col in range(size):
+        nonzero = np.flatnonzero(aug[col:, col])
+        if len(nonzero) == 0:
+            return None
+        pivot = col + nonzero[0]
+        aug[[col, pivot]] = aug[[pivot, col]]
+        aug[col] = aug[col] * pow(int(aug[col, col]), -1, q) % q
+        factors = aug[:, col].copy()
+        factors[col] = 0
+        aug -= factors[:, None] * aug[col] % q
+        aug %= q
+    return aug[:, -1]
 
-    B_reduced = B.LLL()  # Replace with B.BKZ(block_size=20) for better results
+# pure-Python LLL needs minutes at dimension ~100 and does not finish in
+# practice at the 2kn = 1024 of the n = 256 ring; larger embeddings are
+# refused unless max_dimension is raised explicitly
+max_attack_dimension = 128
 
-    for row in B_reduced:
+def attack_secret_vector(A, t, block_size=None, target_norm=50, progress=None, max_dimension=max_attack_dimension):
+    from .lattice import reduce
+
+    if 2 * k * n > max_dimension:
+        raise ValueError(f"embedding dimension {2 * k * n} exceeds max_dimension={max_dimension}; "
+                         f"pure-Python reduction would not finish, use a toy ring (primal_attack, attack-sweep)")
+    M_A = matrix_A_to_coeff_matrix(A, n, q)
+    t_coeffs = vector_to_coeffs(t, n)
+    B = embedding_basis(M_A, q)  # 2kn x 2kn
+
+    def recover(row):
+        # t - e = M_A s for a short e part: solve for s
         e_part = row[:k * n]
-        t_part = row[k * n:]
-        norm_e = sum(x^2 for x in e_part)^0.5
-        if norm_e < 50:  # Heuristic for small e
-            print("Candidate e found:", e_part)
-            print("Corresponding t:", t_part)
-            t_minus_e = [(t_coeffs[i] - e_part[i]) % q for i in range(k * n)]
-            M_A_sage = Matrix(ZZ, M_A)
-            try:
-                s_coeffs = M_A_sage.solve_left(vector(ZZ, t_minus_e))
-                print("Recovered s coefficients:", s_coeffs)
-                s_recovered = [{i: coeff for i, coeff in enumerate(s_coeffs[j * n:(j + 1) * n]) if coeff != 0} for j in range(k)]
-                return s_recovered
-            except ValueError:
-                print("Matrix not invertible or solution invalid.")
+        if np.sqrt(float(e_part @ e_part)) >= target_norm:  # Heuristic for small e
+            return None
+        return solve_mod(M_A, t_coeffs - e_part, q)
+
+    # LLL by default, BKZ with block_size for better results; stop as soon as a candidate solves
+    result = reduce(B, block_size, callback=lambda row: recover(row) is not None, progress=progress)
+    rows = [result.short_vector] if result.short_vector is not None else result.basis
+    for row in rows:
+        s_coeffs = recover(row)
+        if s_coeffs is not None:
+            print("Candidate e found:", row[:k * n])
+            print("Corresponding t:", row[k * n:])
+            print("Recovered s coefficients:", s_coeffs)
+            s_recovered = [{i: int(coeff) for i, coeff in enumerate(s_coeffs[j * n:(j + 1) * n]) if coeff != 0} for j in range(k)]
+            return s_recovered
     print("No suitable short vector found.")
     return None
 
+def print_progress(p):
+    # Gram-Schmidt log-norm profile: first/last entries and the average slope
+    slope = (p.profile[-1] - p.profile[0]) / max(len(p.profile) - 1, 1)
+    print(f"[{p.stage}] tour {p.tour} swaps {p.swaps}: log||b*_0|| = {p.profile[0]:.2f}, "
+          f"log||b*_last|| = {p.profile[-1]:.2f}, slope {slope:.4f}")
+
+# --- Primal Attack with m Samples (Kannan Embedding) ---
+
+def sparse_ternary(shape, low=5, high=10):
+    # generate_vector's noise: low..high-1 nonzero coefficients from {-1, 0, 1} per polynomial
+    shape = tuple(np.atleast_1d(shape))
+    polys = int(np.prod(shape[:-1]))
+    out = np.zeros((polys, shape[-1]), dtype=np.int64)
+    for row in out:
+        size = min(np.random.randint(low, high), shape[-1])
+        row[np.random.choice(shape[-1], size, replace=False)] = np.random.choice([1, 0, -1], size)
+    return out.reshape(shape)
+
+def random_instance(n, k, noise=sparse_ternary):
+    # (M_A, t, s) in coefficient form with generate_matrix's A: 9..14 coefficients in 1..99
+    A = np.zeros((k, k, n), dtype=np.int64)
+    for a in A.reshape(k * k, n):
+        size = min(np.random.randint(9, 15), n)
+        a[np.random.choice(n, size, replace=False)] = np.random.randint(1, 100, size)
+    M_A = np.block([[negacyclic_matrices(A[i, j], q).astype(np.int64) for j in range(k)] for i in range(k)])
+    s = noise((k, n)).ravel()
+    e = noise((k, n)).ravel()
+    return M_A, (M_A @ s + e) % q, s
+
+def kannan_basis(M_A, t, m, scale=1):
+    # first m equations t = M s + e, rows [[I, -M^T, 0], [0, q I, 0], [0, t, scale]]:
+    # (s, e, scale) is a lattice vector of dimension kn + m + 1
+    kn = M_A.shape[1]
+    d = kn + m + 1
+    B = np.zeros((d, d), dtype=np.int64)
+    B[np.arange(kn), np.arange(kn)] = 1
+    B[:kn, kn:kn + m] = (-np.asarray(M_A[:m], dtype=np.int64).T) % q
+    B[np.arange(kn, kn + m), np.arange(kn, kn + m)] = q
+    B[-1, kn:kn + m] = np.asarray(t[:m]) % q
+    B[-1, -1] = scale
+    return B
+
+def primal_attack(M_A, t, m=None, scale=1, block_size=None, progress=None):
+    # returns (s or None, seconds); s is checked against all k*n equations
+    from .lattice import reduce
+    import time
+
+    kn = M_A.shape[1]
+    m = kn if m is None else m
+    t = np.asarray(t, dtype=np.int64)
+
+    def candidate(row):
+        if abs(row[-1]) != scale:
+            return None
+        s = row[:kn] * np.sign(row[-1])
+        residual = (M_A @ s - t + q // 2) % q - q // 2
+        # a wrong s leaves residuals spread over all of Zq
+        return s if np.abs(residual).max() < q // 8 else None
+
+    start = time.perf_counter()
+    result = reduce(kannan_basis(M_A, t, m, scale), block_size,
+                    callback=lambda row: candidate(row) is not None, progress=progress)
+    rows = [result.short_vector] if result.short_vector is not None else result.basis
+    for row in rows:
+        s = candidate(row)
+        if s is not None:
+            return s, time.perf_counter() - start
+    return None, time.perf_counter() - start
+
+def attack_secret_primal(A, t, m=None, scale=1, block_size=None, progress=None):
+    # primal attack on the dict-form (A, t) using the first m of the k*n equations
+    s_coeffs, seconds = primal_attack(matrix_A_to_coeff_matrix(A, n, q).astype(np.int64),
+                                      vector_to_coeffs(t, n), m, scale, block_size, progress)
+    print(f"Primal attack (m = {m}, scale = {scale}) finished in {seconds:.2f} s")
+    if s_coeffs is None:
+        return None
+    return [{i: int(c) % q for i, c in enumerate(s_coeffs[j * n:(j + 1) * n]) if c != 0} for j in range(k)]
+
+def sweep(n, k, ms, scales=(1,), block_size=None, trials=5, noise=sparse_ternary):
+    # success probability and wall time per (m, scale) over fresh instances
+    results = []
+    instances = [random_instance(n, k, noise) for _ in range(trials)]
+    for m in ms:
+        for scale in scales:
+            successes, seconds = 0, []
+            for M_A, t, s in instances:
+                found, elapsed = primal_attack(M_A, t, m, scale, block_size)
+                successes += found is not None and np.array_equal(found, s)
+                seconds.append(elapsed)
+            results.append({"m": m, "scale": scale, "dimension": k * n + m + 1,
+                            "success_rate": successes / trials, "mean_seconds": float(np.mean(seconds))})
+    return results
+
+def recommend(results, min_success=1.0):
+    # cheapest configuration (mean wall time) whose success rate reaches min_success
+    good = [r for r in results if r["success_rate"] >= min_success]
+    return min(good, key=lambda r: r["mean_seconds"]) if good else None
+
+def sweep_main(n=16, trials=5, block_size=None):
+    ms = sorted({max(1, k * n * i // 8) for i in range(1, 9)})
+    results = sweep(n, k, ms, scales=(1, 2), block_size=block_size, trials=trials)
+    print(f"n = {n}, k = {k}, {trials} trials per configuration")
+    print(f"{'m':>5} {'scale':>5} {'dim':>5} {'success':>8} {'seconds':>8}")
+    for r in results:
+        print(f"{r['m']:>5} {r['scale']:>5} {r['dimension']:>5} {r['success_rate']:>8.2f} {r['mean_seconds']:>8.3f}")
+    best = recommend(results)
+    if best is None:
+        print("No configuration recovered s in every trial.")
+    else:
+        print(f"Cheapest reliable configuration: m = {best['m']}, scale = {best['scale']} "
+              f"(dimension {best['dimension']}, {best['mean_seconds']:.3f} s)")
+    return best
+
 # --- Main Execution ---
 
-# Generate key pair
-A = generate_matrix()
-s = generate_vector("s")  # Secret key
-e = generate_vector("e")
-t = generate_public_key(A, s, e)  # Public key
-
-# Generate message and encapsulate
-message = {}
-element_size = np.random.randint(1, 100)
-power_list = np.random.choice(range(0, n), element_size, replace=False)
-for j in range(element_size):
-    message[power_list[j]] = 1
-for key in message:
-    message[key] = (message[key] * 1337) % q
-
-u, v = encapsulate(A, t, e, s, message)
-decapsulate(A, t, e, s, u, v, message)
-
-# Perform the attack
-print("\n--- Starting Attack to Recover Secret Vector s ---")
-recovered_s = attack_secret_vector(A, t)
-if recovered_s:
-    print_vector(recovered_s, "Recovered Secret Vector s")
-    print_vector(s, "Original Secret Vector s")
-else:
-    print("Attack failed to recover s.")
\ No newline at end of file
+def main(toy_n=16):
+    # Generate key pair
+    A = generate_matrix()
+    s = generate_vector("s")  # Secret key
+    e = generate_vector("e")
+    t = generate_public_key(A, s, e)  # Public key
+
+    # Generate message and encapsulate
+    message = {}
+    element_size = np.random.randint(1, 100)
+    power_list = np.random.choice(range(0, n), element_size, replace=False)
+    for j in range(element_size):
+        message[power_list[j]] = 1
+    for key in message:
+        message[key] = (message[key] * 1337) % q
+
+    u, v = encapsulate(A, t, e, s, message)
+    decapsulate(A, t, e, s, u, v, message)
+
+    # Perform the attack on a toy ring with the same kind of A and noise: at
+    # n = 256 the embedding has dimension 1024, out of reach of pure-Python
+    # LLL; n = 16 (dimension 65) takes a few seconds
+    print(f"\n--- Starting Attack to Recover Secret Vector s (toy ring n = {toy_n}) ---")
+    M_A, t_toy, s_toy = random_instance(toy_n, k)
+    recovered, seconds = primal_attack(M_A, t_toy, progress=print_progress)
+    print(f"Reduction finished in {seconds:.2f} s")
+    if recovered is not None:
+        print("Recovered s coefficients:", recovered)
+        print("Original s coefficients: ", s_toy)
+        print("Match:", np.array_equal(recovered, s_toy))
+    else:
+        print("Attack failed to recover s.")
+
+if __name__ == "__main__":
+    main()
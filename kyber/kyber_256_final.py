@@ -1,24 +1,30 @@
 import numpy as np
+from pqcutil.instrument import timed
+from pqcutil.sampling import cbd
+from .poly import Poly, PolyVec, PolyMat
+from .batch import decode_messages, noise_parameters
 
 n = 256
 q = 3329
 k = 2  
 #kyber implementation by sudeep 00:15 march 22 2025  
+@timed("print")
 def print_matrix(A, name="Matrix"):
     print(f"{name}:")
     for row in A:
         for element in row:
             string = ""
-            for key, value in sorted(element.items(), reverse=True):
+            for key, value in sorted(element.to_dict().items(), reverse=True):
                 string += f"{value}x^{key} + "
             print(string[:-3] if string else "0")
     print()
 
+@timed("print")
 def print_vector(vec, name="Vector"):
     print(f"{name}:")
     for element in vec:
         string = ""
-        for key, value in sorted(element.items(), reverse=True):
+        for key, value in sorted(element.to_dict().items(), reverse=True):
             if name == "message":
                 string += f"x^{key} + "
                 continue
@@ -28,148 +34,98 @@ def print_vector(vec, name="Vector"):
 
 
 def generate_matrix():
-    A = [[{} for _ in range(k)] for _ in range(k)]
+    A = PolyMat.zeros(k, k)
     for i in range(k):
         for j in range(k):
-            element = {}
             element_size = np.random.randint(9, 15)
             power_list = np.random.choice(range(0, n), element_size, replace=False)
             coeff_list = np.random.randint(1, 100, element_size)
-            for idx in range(element_size):
-                element[power_list[idx]] = coeff_list[idx]
-            A[i][j] = element
-    print_matrix(A, "Matrix A")
+            A.coeffs[i, j, power_list] = coeff_list
     return A
 
 
-def generate_vector(name):
-    vec = [{} for _ in range(k)]
-    for i in range(k):
-        element = {}
-        element_size = np.random.randint(5, 10)
-        power_list = np.random.choice(range(0, n), element_size, replace=False)
-        coeff_list = np.random.choice([1,0,-1], element_size)
-        coeff_list = [(coeff + q) % q for coeff in coeff_list]
-        for j in range(element_size):
-            element[power_list[j]] = coeff_list[j]
-        vec[i] = element
-    print_vector(vec, name)
-    return vec
-
-def multiply_polynomials(a, b):
-    result = {}
-    for key1, value1 in a.items():
-        for key2, value2 in b.items():
-            new_key = key1 + key2
-            new_val = (value1 * value2) % q
-            if new_key >= n:
-                new_key %= n  
-                new_val = (-new_val) % q  
-            if new_key in result:
-                result[new_key] = (result[new_key] + new_val) % q
-            else:
-                result[new_key] = new_val
-    return result
-
-def add_polynomials(a, b):
-    result = a.copy()
-    for key, value in b.items():
-        if key in result:
-            result[key] = (result[key] + value) % q
-        else:
-            result[key] = value % q
-    return result
+def generate_vector(eta=None):
+    # CBD(eta) noise for the whole k x n vector in one draw; eta1 (s, e, r)
+    # by default, eta2 for e1
+    eta = noise_parameters(k)[0] if eta is None else eta
+    return PolyVec(cbd(eta, (k, n)))
+
+def generate_error():
+    _, eta2 = noise_parameters(k)
+    return Poly(cbd(eta2, n))
+
+def generate_message():
+    message = Poly.zeros()
+    element_size = np.random.randint(1, 100)
+    power_list = np.random.choice(range(0, n), element_size, replace=False)
+    message.coeffs[power_list] = 1337
+    return message
 
 def generate_public_key(A, s, e):
-    t = [{} for _ in range(k)]
-    for i in range(k):
-        element = {}
-        for j in range(k):
-            element = add_polynomials(multiply_polynomials(A[i][j], s[j]), element)
-        t[i] = add_polynomials(element, e[i])
-    print_vector(t, "Vector t (Public Key)")
+    # t = A.s + e, the k x k products are done in the NTT domain
+    t = A @ s
+    t += e
     return t
 
-def sub_polynomials(a , b):
-    result = a.copy()
-    for key , value in b.items():
-        if key in result:
-            result[key] = (q + result[key] - b[key]) % q
-        else:
-            result[key] = (q-b[key]) % q
-    return result
 
+@timed("kyber.encapsulate")
+def encapsulate(A, t, message, r=None, e1=None, e2=None):
+    r = generate_vector() if r is None else r
+    _, eta2 = noise_parameters(k)
+    e1 = generate_vector(eta2) if e1 is None else e1
+    e2 = generate_error() if e2 is None else e2
 
-def encapsulate(A, t, e , s , message):
-    r = generate_vector("r")    
-    e1 = generate_vector("e1")  
+    # u uses A transposed so that t.r - s.u cancels for any A, not just symmetric ones
+    u = A.T @ r
+    u += e1
+    v = t @ r
 
-    u = [{} for _ in range(k)]
-    for i in range(k):
-        element = {}
-        for j in range(k):
-            element = add_polynomials(multiply_polynomials(A[i][j], r[j]), element)
-        u[i] = add_polynomials(element, e1[i])
+    # Final ciphertext computation
+    v += e2
+    v += message
+    return u, v
 
-    v = {}
-    for i in range(k):
-        v = add_polynomials(v, multiply_polynomials(t[i], r[i]))
+@timed("kyber.decapsulate")
+def decapsulate(s, u, v):
+    # message bits: 1 where w is closest to q/2
+    w = v - s @ u
+    return decode_messages(w.coeffs)
 
-    
-    e2 = {}
-    power_list = np.random.choice(range(0, n), 1, replace=False)
-    coeff_list = np.random.choice([1,2,0], 1)
-    for j in range(1):
-        e2[power_list[j]] = coeff_list[j]
 
-    # Final ciphertext computation
-    v = add_polynomials(v, e2)
-    v = add_polynomials(v, message)
-    
+def main():
+    A = generate_matrix()
+    print_matrix(A, "Matrix A")
+    s = generate_vector()
+    print_vector(s, "s")
+    e = generate_vector()
+    print_vector(e, "e")
+    t = generate_public_key(A, s, e)
+    print_vector(t, "Vector t (Public Key)")
+
+    message = generate_message()
+    r = generate_vector()
+    print_vector(r, "r")
+    e1 = generate_vector(noise_parameters(k)[1])
+    print_vector(e1, "e1")
+    e2 = generate_error()
+    u, v = encapsulate(A, t, message, r, e1, e2)
     print_vector(e1 , "Vector e1")
     print_vector([e2] , "Scalar e2")
     print_vector([message] , "message")
     print_vector(u, "Vector u (Ciphertext Part 1)")
     print_vector([v], "Scalar v (Ciphertext Part 2)")
-    
-    return u, v
 
-def decapsulate(A,t,e,s,u,v,message):
-    v_prime = {}
-    for i in range(0,k):
-        v_prime = add_polynomials(v_prime , multiply_polynomials(s[i] , u[i]))
-    
-    print_vector([v_prime], "Scalar v' (Ciphertext Part 2)")
-    
-    w = {}
+    #kyber implementation by sudeep 5:30am march 23 2025 
+    print_vector([s @ u], "Scalar v' (Ciphertext Part 2)")
+    bits = decapsulate(s, u, v)
     string = ""
-    w = sub_polynomials(v , v_prime)
-    for key , value in sorted(w.items() , reverse=True):
-        if value >= 832 and value <= 2496:
-            value = 1
-            string += "x^" + str(key) + " + "
+    for key in np.flatnonzero(bits)[::-1]:
+        string += "x^" + str(key) + " + "
     print("W (message) after encoding closest to 1664 ie q / 2 to 1 and rest to 0")
     print()
     print(string[:-3])
     print_vector([message],"message")
 
 
-A = generate_matrix()
-s = generate_vector("s")
-e = generate_vector("e")
-t = generate_public_key(A, s, e)
-
-message = {}
-element = message
-element_size = np.random.randint(1, 100)
-power_list = np.random.choice(range(0, n), element_size, replace=False)
-for j in range(element_size):
-    element[power_list[j]] = 1
-
-for key , value in message.items():
-    message[key] = (message[key] * 1337) % q
-
-u, v = encapsulate(A, t, e , s , message)
-#kyber implementation by sudeep 5:30am march 23 2025 
-decapsulate(A,t,e,s,u,v,message)
-
+if __name__ == "__main__":
+    main()
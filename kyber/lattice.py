@@ -0,0 +1,192 @@
+from collections import namedtuple
+import numpy as np
+
+# Lattice reduction on row bases: floating-point LLL with incremental
+# Gram-Schmidt updates and BKZ with Schnorr-Euchner enumeration.
+#
+# Both reducers can stop early:
+#   target_norm / callback  checked on every freshly size-reduced vector;
+#                           reduction stops once callback(vector) is true
+#                           (or the vector is shorter than target_norm)
+#   progress                called with a Progress snapshot every
+#                           progress_interval swaps (LLL) or once per tour
+#                           (BKZ); returning False cuts the run short
+# The Gram-Schmidt log-norm profile log ||b*_i|| in the snapshots shows
+# how far the reduction has come.
+
+Progress = namedtuple("Progress", "stage swaps tour index profile")
+Result = namedtuple("Result", "basis profile swaps tours stopped short_vector")
+
+def gso(B):
+    # mu (lower triangular, unit diagonal) and ||b*_i||^2 of the rows of B
+    B = np.asarray(B, dtype=np.float64)
+    d = B.shape[0]
+    mu = np.eye(d)
+    Bs = np.array(B)
+    Bn = np.zeros(d)
+    for i in range(d):
+        if i:
+            mu[i, :i] = Bs[:i] @ B[i] / np.where(Bn[:i] > 0, Bn[:i], 1)
+            Bs[i] = B[i] - mu[i, :i] @ Bs[:i]
+        Bn[i] = Bs[i] @ Bs[i]
+    return mu, Bn
+
+def profile(Bn):
+    return 0.5 * np.log(np.maximum(Bn, 1e-300))
+
+class _Stop(Exception):
+    def __init__(self, vector):
+        self.vector = vector
+
+def _make_check(target_norm, callback):
+    if target_norm is None and callback is None:
+        return None
+    bound = None if target_norm is None else target_norm * target_norm
+
+    def check(v):
+        if bound is not None and int(v @ v) >= bound:
+            return
+        if callback is None or callback(v):
+            raise _Stop(v.copy())
+    return check
+
+def _lll(B, mu, Bn, start, end, delta, check, progress, progress_interval, swaps):
+    # LLL on rows [start, end) of B in place, keeping mu / Bn up to date
+    k = max(start + 1, 1)
+    while k < end:
+        for j in range(k - 1, -1, -1):
+            r = int(np.rint(mu[k, j]))
+            if r:
+                B[k] -= r * B[j]
+                mu[k, :j] -= r * mu[j, :j]
+                mu[k, j] -= r
+        if check is not None:
+            check(B[k])
+        m = mu[k, k - 1]
+        if Bn[k] >= (delta - m * m) * Bn[k - 1]:
+            k += 1
+            continue
+        # swap b_(k-1) and b_k, update the Gram-Schmidt data of rows k-1, k and below
+        B[[k - 1, k]] = B[[k, k - 1]]
+        Bk = Bn[k] + m * m * Bn[k - 1]
+        mu[k, k - 1] = m * Bn[k - 1] / Bk
+        Bn[k] = Bn[k - 1] * Bn[k] / Bk
+        Bn[k - 1] = Bk
+        mu[[k - 1, k], :k - 1] = mu[[k, k - 1], :k - 1]
+        t = mu[k + 1:, k].copy()
+        mu[k + 1:, k] = mu[k + 1:, k - 1] - m * t
+        mu[k + 1:, k - 1] = t + mu[k, k - 1] * mu[k + 1:, k]
+        swaps[0] += 1
+        if progress is not None and swaps[0] % progress_interval == 0:
+            if progress(Progress("lll", swaps[0], None, k, profile(Bn))) is False:
+                return False
+        k = max(k - 1, start + 1, 1)
+    return True
+
+def lll(B, delta=0.99, target_norm=None, callback=None, progress=None, progress_interval=1000):
+    B = np.array(B, dtype=np.int64)
+    mu, Bn = gso(B)
+    swaps = [0]
+    try:
+        done = _lll(B, mu, Bn, 0, len(B), delta, _make_check(target_norm, callback),
+                    progress, progress_interval, swaps)
+    except _Stop as stop:
+        return Result(B, profile(Bn), swaps[0], 0, True, stop.vector)
+    return Result(B, profile(Bn), swaps[0], 0, not done, None)
+
+def _enumerate(mu, Bn, k, h, radius):
+    # shortest nonzero x with ||pi_k(sum x_i b_(k+i))||^2 < radius, or None
+    d = h - k
+    best = [radius, None]
+    x = [0] * d
+
+    def search(i, partial):
+        center = -sum(x[j] * mu[k + j, k + i] for j in range(i + 1, d))
+        c = int(np.rint(center))
+        step = 0
+        while True:
+            # zig-zag around the centre: c, c+1, c-1, c+2, ...
+            for xi in ((c,) if step == 0 else (c + step, c - step)):
+                length = partial + (xi - center) ** 2 * Bn[k + i]
+                if length >= best[0]:
+                    continue
+                x[i] = xi
+                if i == 0:
+                    if any(x):
+                        best[0], best[1] = length, list(x)
+                else:
+                    search(i - 1, length)
+            if partial + (step + 1 - abs(center - c)) ** 2 * Bn[k + i] >= best[0]:
+                break
+            step += 1
+        x[i] = 0
+
+    search(d - 1, 0.0)
+    return best[1]
+
+def _insert(B, k, x):
+    # replace rows k..k+len(x)-1 by a basis of the same lattice whose first
+    # vector is sum x_i b_(k+i) (x is primitive, so the transform is unimodular)
+    rows = [B[k + i].copy() for i in range(len(x))]
+    carried, c = None, 0
+    out = []
+    for i in range(len(x) - 1, -1, -1):
+        xi = int(x[i])
+        if xi == 0:
+            out.append(rows[i])
+            continue
+        if carried is None:
+            carried, c = rows[i], xi
+            continue
+        g, a, b = _xgcd(xi, c)
+        w = (xi // g) * rows[i] + (c // g) * carried
+        out.append(-b * rows[i] + a * carried)
+        carried, c = w, g
+    if c < 0:
+        carried = -carried
+    B[k:k + len(x)] = np.array([carried] + out[::-1])
+
+def _xgcd(a, b):
+    x0, x1, y0, y1 = 1, 0, 0, 1
+    while b:
+        quot, a, b = a // b, b, a % b
+        x0, x1 = x1, x0 - quot * x1
+        y0, y1 = y1, y0 - quot * y1
+    return a, x0, y0
+
+def bkz(B, block_size=10, delta=0.99, max_tours=8, target_norm=None, callback=None,
+        progress=None, progress_interval=1000):
+    B = np.array(B, dtype=np.int64)
+    d = len(B)
+    check = _make_check(target_norm, callback)
+    swaps = [0]
+    mu, Bn = gso(B)
+    tour = 0
+    try:
+        if not _lll(B, mu, Bn, 0, d, delta, check, progress, progress_interval, swaps):
+            return Result(B, profile(Bn), swaps[0], 0, True, None)
+        for tour in range(1, max_tours + 1):
+            changed = False
+            for k in range(d - 1):
+                h = min(k + block_size, d)
+                x = _enumerate(mu, Bn, k, h, 0.99 * Bn[k])
+                if x is None:
+                    continue
+                _insert(B, k, x)
+                mu, Bn = gso(B)
+                if not _lll(B, mu, Bn, 0, d, delta, check, progress, progress_interval, swaps):
+                    return Result(B, profile(Bn), swaps[0], tour, True, None)
+                changed = True
+            if progress is not None and progress(Progress("bkz", swaps[0], tour, d, profile(Bn))) is False:
+                return Result(B, profile(Bn), swaps[0], tour, True, None)
+            if not changed:
+                break
+    except _Stop as stop:
+        return Result(B, profile(Bn), swaps[0], tour, True, stop.vector)
+    return Result(B, profile(Bn), swaps[0], tour, False, None)
+
+def reduce(B, block_size=None, **kwargs):
+    # LLL when block_size is None (or < 3), BKZ otherwise
+    if block_size is None or block_size < 3:
+        return lll(B, **kwargs)
+    return bkz(B, block_size, **kwargs)
@@ -0,0 +1,107 @@
+import numpy as np
+from pqcutil.instrument import timed
+from pqcutil.modarith import Modulus
+
+n = 256
+q = 3329
+root = 17  # primitive 256-th root of unity mod q
+
+# Number Theoretic Transform for Zq[x]/(x^256 + 1), Kyber style:
+# 7 layers of butterflies split the ring into 128 quadratic factors
+# (x^2 - gamma_i), products are then done pairwise with basemul.
+
+def bitrev7(i):
+    return int(format(i, "07b")[::-1], 2)
+
+ZETAS = np.array([pow(root, bitrev7(i), q) for i in range(128)], dtype=np.int64)
+ZETAS_INV = np.array([pow(int(z), -1, q) for z in ZETAS], dtype=np.int64)
+GAMMAS = np.array([pow(root, 2 * bitrev7(i) + 1, q) for i in range(128)], dtype=np.int64)
+N_INV = pow(128, -1, q)  # 3303, undoes the factor 2 of every inverse layer
+
+# (zeta index, half length) of each layer, outermost first
+LAYERS = []
+_z = 1
+_length = 128
+while _length >= 2:
+    LAYERS.append((_z, _length))
+    _z += n // (2 * _length)
+    _length //= 2
+
+# Kernels run on int32 lanes with lazy reduction (pqcutil.modarith):
+# twiddles and gammas are kept in Montgomery form, butterflies reduce only
+# when the tracked bound requires it, and the pair products of basemul stay
+# unreduced (|x| < 2 q^2) so the k terms of a matrix-vector row or inner
+# product are summed before one final reduction. Outputs are int32 in [0, q).
+
+mod = Modulus(q)
+ZETAS_MONT = mod.to_mont(ZETAS)
+ZETAS_INV_MONT = mod.to_mont(ZETAS_INV)
+GAMMAS_MONT = mod.to_mont(GAMMAS)
+N_INV_MONT = mod.to_mont(N_INV)
+
+# coefficient operations: one butterfly touches two coefficients per layer,
+# one ring product is counted per output coefficient and term summed
+def _butterflies(out, *args):
+    return out.size * len(LAYERS)
+
+def _terms(out, a_hat, b_hat):
+    return out.size * (np.shape(a_hat)[-2] if np.ndim(a_hat) >= 2 else 1)
+
+@timed("kyber.ntt", ops=_butterflies)
+def ntt(a):
+    # a: (..., n) coefficients, any leading batch shape
+    a, bound = mod.lanes(a)
+    a, bound = mod.forward(a, ZETAS_MONT, LAYERS, bound)
+    return mod.canonical(a, bound, "ntt output")
+
+@timed("kyber.intt", ops=_butterflies)
+def intt(a_hat):
+    a, bound = mod.lanes(a_hat)
+    a, bound = mod.inverse(a, ZETAS_INV_MONT, LAYERS, bound, N_INV_MONT)
+    return mod.canonical(a, bound, "intt output")
+
+def _reduced(a):
+    a, bound = mod.lanes(a)
+    return mod.fold(a, bound, q, "basemul input")
+
+def _products(a_hat, b_hat):
+    # unreduced basemul: pairs (a0 b0 + a1 b1 gamma, a0 b1 + a1 b0), and their bound
+    a, ba = _reduced(a_hat)
+    b, bb = _reduced(b_hat)
+    shape = np.broadcast_shapes(a.shape, b.shape)
+    a = a.reshape(a.shape[:-1] + (n // 2, 2))
+    b = b.reshape(b.shape[:-1] + (n // 2, 2))
+    a0, a1 = a[..., 0], a[..., 1]
+    b0, b1 = b[..., 0], b[..., 1]
+    # mont(a1 b1) = a1 b1 2^-16 and gamma is stored as gamma 2^16: the raw product is a1 b1 gamma
+    r0 = a0 * b0 + mod.mont(a1 * b1, ba * bb, "basemul a1 b1") * GAMMAS_MONT
+    r1 = a0 * b1 + a1 * b0
+    return np.stack((r0, r1), axis=-1).reshape(shape), max(ba * bb + q * q, 2 * ba * bb)
+
+def _accumulate(r, bound, axis):
+    # sum products over axis, reducing the terms first only if the sum could
+    # overflow int32
+    terms = r.shape[axis]
+    if bound * terms > mod.lane_limit:
+        r, bound = mod.canonical(r, bound, "partial products"), q
+    return r.sum(axis=axis, dtype=np.int32), bound * terms
+
+@timed("kyber.ring_mul", ops=lambda out, *args: out.size)
+def basemul(a_hat, b_hat):
+    # pointwise product of the 128 degree-1 residues mod (x^2 - gamma_i)
+    return mod.canonical(*_products(a_hat, b_hat), "basemul output")
+
+@timed("kyber.ring_mul", ops=_terms)
+def matrix_vector_ntt(A_hat, s_hat):
+    # A_hat: (..., k, k, n), s_hat: (..., k, n) -> (..., k, n), all in NTT domain
+    r, bound = _products(A_hat, np.asarray(s_hat)[..., None, :, :])
+    return mod.canonical(*_accumulate(r, bound, -2), "matrix-vector output")
+
+@timed("kyber.ring_mul", ops=_terms)
+def inner_product_ntt(t_hat, r_hat):
+    # t_hat, r_hat: (..., k, n) -> (..., n)
+    r, bound = _products(t_hat, r_hat)
+    return mod.canonical(*_accumulate(r, bound, -2), "inner product output")
+
+def multiply_ntt(a, b):
+    return intt(basemul(ntt(a), ntt(b)))
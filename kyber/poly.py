@@ -0,0 +1,142 @@
+import numpy as np
+from .ntt import n, q, ntt, intt, basemul, matrix_vector_ntt, inner_product_ntt
+
+# Dense ring elements of Zq[x]/(x^n + 1). Coefficients are kept reduced in
+# [0, q) as int16 (q < 2^15, and a sum of two fits as well). Products go
+# through the NTT kernels, which run on int32 lanes with Montgomery
+# twiddles and reduce lazily on tracked bounds (pqcutil.modarith); their
+# outputs come back in [0, q) and are stored as int16.
+dtype = np.int16
+
+def _reduce_add(c):
+    # c in [0, 2q) -> [0, q) without a division
+    np.subtract(c, q, out=c, where=c >= q)
+    return c
+
+def _reduce_sub(c):
+    # c in (-q, q) -> [0, q)
+    np.add(c, q, out=c, where=c < 0)
+    return c
+
+class _RingArray:
+    __slots__ = ("coeffs",)
+    ndim = 1
+
+    def __init__(self, coeffs):
+        coeffs = np.asarray(coeffs)
+        if coeffs.ndim != self.ndim or coeffs.shape[-1] != n:
+            raise ValueError(f"{type(self).__name__} expects {self.ndim}-d coefficients ending in {n}, got {coeffs.shape}")
+        if coeffs.dtype != dtype or coeffs.min(initial=0) < 0 or coeffs.max(initial=0) >= q:
+            coeffs = (coeffs.astype(np.int64) % q).astype(dtype)
+        self.coeffs = np.ascontiguousarray(coeffs)
+
+    @classmethod
+    def zeros(cls, *shape):
+        return cls(np.zeros(shape + (n,), dtype=dtype))
+
+    @property
+    def shape(self):
+        return self.coeffs.shape
+
+    @property
+    def nbytes(self):
+        return self.coeffs.nbytes
+
+    def copy(self):
+        return type(self)(self.coeffs.copy())
+
+    def centered(self):
+        # representatives in (-q/2, q/2]
+        c = self.coeffs.astype(np.int32)
+        return np.where(c > q // 2, c - q, c)
+
+    def __iadd__(self, other):
+        np.add(self.coeffs, other.coeffs, out=self.coeffs)
+        _reduce_add(self.coeffs)
+        return self
+
+    def __isub__(self, other):
+        np.subtract(self.coeffs, other.coeffs, out=self.coeffs)
+        _reduce_sub(self.coeffs)
+        return self
+
+    def __add__(self, other):
+        result = self.copy()
+        result += other
+        return result
+
+    def __sub__(self, other):
+        result = self.copy()
+        result -= other
+        return result
+
+    def __neg__(self):
+        return type(self)((q - self.coeffs) % q)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and np.array_equal(self.coeffs, other.coeffs)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(shape={self.shape})"
+
+class Poly(_RingArray):
+    __slots__ = ()
+    ndim = 1
+
+    @classmethod
+    def from_dict(cls, poly):
+        coeffs = np.zeros(n, dtype=np.int64)
+        for key, value in poly.items():
+            coeffs[key] += value
+        return cls(coeffs)
+
+    def to_dict(self):
+        return {int(i): int(self.coeffs[i]) for i in np.flatnonzero(self.coeffs)}
+
+    def __mul__(self, other):
+        return Poly(intt(basemul(ntt(self.coeffs), ntt(other.coeffs))))
+
+class PolyVec(_RingArray):
+    __slots__ = ()
+    ndim = 2
+
+    @classmethod
+    def from_dict(cls, vec):
+        return cls(np.array([Poly.from_dict(element).coeffs for element in vec]))
+
+    def to_dict(self):
+        return [Poly(row).to_dict() for row in self.coeffs]
+
+    def __len__(self):
+        return self.coeffs.shape[0]
+
+    def __getitem__(self, i):
+        return Poly(self.coeffs[i])
+
+    def __matmul__(self, other):
+        # inner product <self, other>
+        return Poly(intt(inner_product_ntt(ntt(self.coeffs), ntt(other.coeffs))))
+
+class PolyMat(_RingArray):
+    __slots__ = ()
+    ndim = 3
+
+    @classmethod
+    def from_dict(cls, A):
+        return cls(np.array([[Poly.from_dict(element).coeffs for element in row] for row in A]))
+
+    def to_dict(self):
+        return [[Poly(element).to_dict() for element in row] for row in self.coeffs]
+
+    def __len__(self):
+        return self.coeffs.shape[0]
+
+    def __getitem__(self, i):
+        return PolyVec(self.coeffs[i])
+
+    @property
+    def T(self):
+        return PolyMat(self.coeffs.transpose(1, 0, 2))
+
+    def __matmul__(self, vec):
+        return PolyVec(intt(matrix_vector_ntt(ntt(self.coeffs), ntt(vec.coeffs))))
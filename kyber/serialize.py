@@ -0,0 +1,104 @@
+import numpy as np
+from pqcutil.instrument import timed
+from .ntt import n, q
+from .poly import PolyVec
+from .keys import PublicKey, SecretKey
+from .expand import seed_bytes
+
+# Wire format. Key polynomials are packed with 12 bits per coefficient,
+# ciphertexts are compressed first (du bits for u, dv bits for v), giving
+# the usual sizes: k=2 -> 800-byte public key, 768-byte ciphertext.
+# Batches are encoded back to back with a fixed stride, so a whole batch
+# of ciphertexts is one bytes object and decodes in one vectorised pass.
+
+compression = {2: (10, 4), 3: (10, 4), 4: (11, 5)}  # k -> (du, dv)
+
+def compress(x, d):
+    # round(2^d / q * x) mod 2^d
+    x = np.asarray(x, dtype=np.int64)
+    return (((x << d) + q // 2) // q) & ((1 << d) - 1)
+
+def decompress(y, d):
+    # round(q / 2^d * y)
+    y = np.asarray(y, dtype=np.int64)
+    return (y * q + (1 << (d - 1))) >> d
+
+def pack(coeffs, d):
+    # (..., n) values < 2^d -> (..., n*d/8) bytes, little-endian bit order
+    c = np.asarray(coeffs, dtype=np.uint16)
+    bits = ((c[..., None] >> np.arange(d, dtype=np.uint16)) & 1).astype(np.uint8)
+    return np.packbits(bits.reshape(c.shape[:-1] + (n * d,)), axis=-1, bitorder="little")
+
+def unpack(buf, d, lead=()):
+    # bytes-like (bytes, bytearray, memoryview, mmap) or uint8 array -> (*lead, n) values
+    raw = buf if isinstance(buf, np.ndarray) else np.frombuffer(buf, dtype=np.uint8)
+    raw = raw.reshape(tuple(lead) + (n * d // 8,))
+    bits = np.unpackbits(raw, axis=-1, bitorder="little").reshape(tuple(lead) + (n, d))
+    return bits.astype(np.uint16) @ (1 << np.arange(d, dtype=np.uint16))
+
+def _unpack_key(buf, k, what):
+    # 12-bit packed (k, n) coefficients, each of which must be below q
+    coeffs = unpack(buf, 12, (k,))
+    if np.any(coeffs >= q):
+        raise ValueError(f"{what} has a coefficient outside [0, q)")
+    return PolyVec(coeffs.astype(np.int16))
+
+def public_key_bytes(k):
+    return k * n * 12 // 8 + seed_bytes
+
+def secret_key_bytes(k):
+    return k * n * 12 // 8
+
+def ciphertext_bytes(k):
+    du, dv = compression[k]
+    return (k * du + dv) * n // 8
+
+def encode_public_key(pk):
+    # t || rho
+    if pk.seed is None:
+        raise ValueError("only seed-expanded public keys can be serialized")
+    return pack(pk.t.coeffs, 12).tobytes() + pk.seed
+
+def decode_public_key(buf, k, cache=None):
+    buf = memoryview(buf)
+    if len(buf) != public_key_bytes(k):
+        raise ValueError(f"public key must be {public_key_bytes(k)} bytes for k={k}, got {len(buf)}")
+    split = secret_key_bytes(k)
+    return PublicKey.from_seed(bytes(buf[split:]), _unpack_key(buf[:split], k, "public key"), cache)
+
+def encode_secret_key(sk):
+    return pack(sk.s.coeffs, 12).tobytes()
+
+def decode_secret_key(buf, k, cache=None):
+    if len(buf) != secret_key_bytes(k):
+        raise ValueError(f"secret key must be {secret_key_bytes(k)} bytes for k={k}, got {len(buf)}")
+    return SecretKey(_unpack_key(buf, k, "secret key"), cache)
+
+@timed("kyber.pack", ops=lambda out, u, v: np.size(u) + np.size(v))
+def encode_ciphertext(u, v):
+    # u: (k, n) or (batch, k, n), v: (n,) or (batch, n)
+    u = np.asarray(u)
+    v = np.asarray(v)
+    du, dv = compression[u.shape[-2]]
+    lead = v.shape[:-1]
+    pu = pack(compress(u, du), du).reshape(lead + (-1,))
+    pv = pack(compress(v, dv), dv)
+    return np.concatenate((pu, pv), axis=-1).tobytes()
+
+@timed("kyber.unpack", ops=lambda out, *args: out[0].size + out[1].size)
+def decode_ciphertext(buf, k):
+    # a single ciphertext gives (k, n), (n,); a concatenation of several
+    # gives (batch, k, n), (batch, n)
+    du, dv = compression[k]
+    size = ciphertext_bytes(k)
+    raw = np.frombuffer(buf, dtype=np.uint8)
+    if len(raw) % size:
+        raise ValueError(f"ciphertext length {len(raw)} is not a multiple of {size}")
+    batch = len(raw) // size
+    raw = raw.reshape(batch, size)
+    split = k * du * n // 8
+    u = decompress(unpack(raw[:, :split], du, (batch, k)), du).astype(np.int16) % q
+    v = decompress(unpack(raw[:, split:], dv, (batch,)), dv).astype(np.int16) % q
+    if len(buf) == size:
+        return u[0], v[0]
+    return u, v
@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import time
+from contextlib import asynccontextmanager
+import numpy as np
+from pqcutil.sampling import RandomPool, default_pool
+from .batch import encode_messages, generate_randomness
+from .ntt import n
+from .serialize import (ciphertext_bytes, decode_ciphertext, decode_public_key,
+                        encode_ciphertext, encode_public_key, public_key_bytes)
+
+# Kyber key exchange over TCP with asyncio. On connect the server sends
+#     magic || k (1 byte) || public key
+# and the connection then carries any number of handshakes, each
+#     client -> server  ciphertext of a random 256-bit message
+#     server -> client  32-byte confirmation tag
+# Both sides derive key = SHAKE-256(message || SHA3-256(ciphertext)), and
+# the tag SHA3-256("confirm" || key) tells the client the server recovered
+# the same message.
+#
+# The server key is long-lived, so decapsulation follows the
+# Fujisaki-Okamoto transform: the noise r, e1, e2 of a ciphertext is drawn
+# from SHAKE-256 seeded by SHA3-256(message || SHA3-256(public key)), the
+# server re-encrypts the message it decrypted and compares. On a mismatch
+# the key is SHAKE-256(z || SHA3-256(ciphertext)) for a secret z, so a
+# crafted ciphertext only ever gets a pseudorandom tag back and the
+# confirmation cannot be used as a decryption oracle.
+#
+# Ciphertexts arriving within window seconds of each other
+# (up to max_batch of them) are decapsulated in one batched call, which runs
+# in a worker thread so the event loop keeps reading the next batch.
+# Clients reuse connections through a ConnectionPool.
+
+magic = b"KYKX\x01"
+key_bytes = 32
+tag_bytes = 32
+
+def session_key(bits, ct):
+    return hashlib.shake_256(np.packbits(bits).tobytes() + hashlib.sha3_256(ct).digest()).digest(key_bytes)
+
+def rejection_key(z, ct):
+    return hashlib.shake_256(z + hashlib.sha3_256(ct).digest()).digest(key_bytes)
+
+def confirmation(key):
+    return hashlib.sha3_256(b"confirm" + key).digest()
+
+def encrypt(pk, pk_hash, bits):
+    # (batch, n) message bits -> list of ciphertexts, with the noise derived
+    # from each message (deterministic, so the server can re-encrypt)
+    noise = [generate_randomness(1, pk.k, RandomPool(hashlib.sha3_256(np.packbits(b).tobytes() + pk_hash).digest()))
+             for b in bits]
+    r, e1, e2 = (np.concatenate(parts) for parts in zip(*noise))
+    u, v = pk.encapsulate(encode_messages(bits), r, e1, e2)
+    blob = encode_ciphertext(u, v)
+    size = ciphertext_bytes(pk.k)
+    return [blob[i * size:(i + 1) * size] for i in range(len(bits))]
+
+class KeyExchangeServer:
+    def __init__(self, pk, sk, window=0.002, max_batch=256):
+        self.pk = pk
+        self.sk = sk
+        self.window = window
+        self.max_batch = max_batch
+        pk_bytes = encode_public_key(pk)
+        self.hello = magic + bytes([pk.k]) + pk_bytes
+        self.pk_hash = hashlib.sha3_256(pk_bytes).digest()
+        self._z = os.urandom(key_bytes)  # implicit-rejection secret
+        self.batches = []  # size of every decapsulation batch so far
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        # returns the bound (host, port); port 0 picks a free one
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        size = ciphertext_bytes(self.pk.k)
+        try:
+            writer.write(self.hello)
+            while True:
+                try:
+                    ct = await reader.readexactly(size)
+                except asyncio.IncompleteReadError:
+                    break  # client closed the connection
+                writer.write(confirmation(await self._submit(ct)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _submit(self, ct):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((ct, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batches.append(len(batch))
+            task = asyncio.ensure_future(self._decapsulate(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _decapsulate(self, batch):
+        cts = [ct for ct, _ in batch]
+        try:
+            keys = await asyncio.get_running_loop().run_in_executor(None, self._keys, cts)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), key in zip(batch, keys):
+            if not future.done():
+                future.set_result(key)
+
+    def _keys(self, cts):
+        u, v = decode_ciphertext(b"".join(cts), self.pk.k)
+        bits = self.sk.decapsulate(u, v).reshape(len(cts), n)
+        again = encrypt(self.pk, self.pk_hash, bits)
+        return [session_key(b, ct) if hmac.compare_digest(ct, ct2) else rejection_key(self._z, ct)
+                for b, ct, ct2 in zip(bits, cts, again)]
+
+class Connection:
+    def __init__(self, reader, writer, pk, pk_hash):
+        self.reader = reader
+        self.writer = writer
+        self.pk = pk
+        self.pk_hash = pk_hash
+
+    async def handshake(self):
+        # one key exchange -> 32-byte session key
+        bits = np.unpackbits(default_pool.read(n // 8))
+        ct = encrypt(self.pk, self.pk_hash, bits[None])[0]
+        self.writer.write(ct)
+        await self.writer.drain()
+        tag = await self.reader.readexactly(tag_bytes)
+        key = session_key(bits, ct)
+        if not hmac.compare_digest(tag, confirmation(key)):
+            raise ValueError("key confirmation failed")
+        return key
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+async def connect(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    header = await reader.readexactly(len(magic) + 1)
+    if header[:len(magic)] != magic:
+        writer.close()
+        raise ValueError("not a Kyber key-exchange server")
+    k = header[-1]
+    pk_bytes = await reader.readexactly(public_key_bytes(k))
+    return Connection(reader, writer, decode_public_key(pk_bytes, k), hashlib.sha3_256(pk_bytes).digest())
+
+class ConnectionPool:
+    # at most size open connections; idle ones are reused, a connection that
+    # fails during use is closed instead of returned
+    def __init__(self, host, port, size=8):
+        self.host = host
+        self.port = port
+        self.size = size
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+
+    @asynccontextmanager
+    async def connection(self):
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else await connect(self.host, self.port)
+            try:
+                yield conn
+            except BaseException:
+                await conn.close()
+                raise
+            self._idle.append(conn)
+
+    async def handshake(self):
+        async with self.connection() as conn:
+            return await conn.handshake()
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await conn.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+async def load_test(clients=200, handshakes=10, pool_size=64, window=0.002, max_batch=256, k=2):
+    # clients concurrent tasks, each running handshakes key exchanges through
+    # one shared pool against a localhost server -> (latencies, seconds, batch sizes);
+    # latencies include the wait for a free pool connection
+    from .keys import generate_keypair
+
+    pk, sk = generate_keypair(k)
+    server = KeyExchangeServer(pk, sk, window, max_batch)
+    host, port = await server.start()
+    latencies = []
+
+    async def client(pool):
+        for _ in range(handshakes):
+            start = time.perf_counter()
+            await pool.handshake()
+            latencies.append(time.perf_counter() - start)
+
+    try:
+        async with ConnectionPool(host, port, pool_size) as pool:
+            await pool.handshake()  # warm-up: NTT tables and key transforms
+            latencies.clear()
+            server.batches.clear()
+            start = time.perf_counter()
+            await asyncio.gather(*(client(pool) for _ in range(clients)))
+            elapsed = time.perf_counter() - start
+    finally:
+        await server.close()
+    return np.array(latencies), elapsed, server.batches
+
+def main(clients=200, handshakes=10, pool_size=64):
+    # the clients encapsulate in the same process, so their work bounds the
+    # rate; max_batch=1 is the unbatched server for comparison
+    print(f"{clients} clients x {handshakes} handshakes, pool of {pool_size} connections, localhost")
+    for window, max_batch in ((0.0, 1), (0.0, 256), (0.002, 256), (0.01, 256)):
+        latencies, elapsed, batches = asyncio.run(load_test(clients, handshakes, pool_size, window, max_batch))
+        p50, p90, p99 = np.percentile(latencies, (50, 90, 99)) * 1e3
+        print(f"window {window * 1e3:4.1f} ms, max batch {max_batch:3}: {len(latencies) / elapsed:6.0f} handshakes/s  "
+              f"p50 {p50:.2f} ms  p90 {p90:.2f} ms  p99 {p99:.2f} ms  "
+              f"batch mean {np.mean(batches):.1f} max {max(batches)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Helpers shared by the kyber and falcon packages.
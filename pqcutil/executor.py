@@ -0,0 +1,230 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+# Process-pool execution of Kyber / Falcon operations. Every call returns a
+# concurrent.futures.Future. Public data that many tasks read (Kyber A^T hat
+# and t hat, Falcon h) is copied once into multiprocessing.shared_memory and
+# tasks only carry a small handle; each worker attaches a segment on first
+# use and keeps the view. Falcon secret keys travel with each signing task
+# (4n small integers); workers keep the SecretKey, and so its ffLDL tree,
+# across tasks.
+#
+# Segments are kept for the max_segments most recently used keys: an older
+# one is unlinked once no submitted task still needs it, and workers keep
+# at most max_segments attachments, closing the least recently used, so a
+# long-running executor serving many recipients holds a bounded amount of
+# /dev/shm.
+#
+# The NTT twiddle tables are not shared: they are a few KB, built at import
+# (Kyber) or on first use per n (Falcon), which is cheaper than attaching.
+
+class SharedArray:
+    # picklable handle to an array living in a shared memory segment
+    def __init__(self, name, shape, dtype):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    @classmethod
+    def create(cls, array):
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+        return cls(shm.name, array.shape, array.dtype.str), shm
+
+# worker-side state
+_attached = OrderedDict()
+_max_attached = 256
+_falcon_keys = {}
+
+def _init_worker(max_attached=256):
+    # forked workers inherit the parent's random state, start fresh streams
+    global _max_attached
+    _max_attached = max_attached
+    from pqcutil import sampling
+    sampling.default_pool = sampling.RandomPool()
+    np.random.seed()
+
+def _attach(handle):
+    if handle.name in _attached:
+        _attached.move_to_end(handle.name)
+    else:
+        # the parent owns and unlinks the segment, so the worker must not
+        # register it with a resource tracker (Python < 3.13 has no track=False)
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            shm = shared_memory.SharedMemory(name=handle.name)
+        finally:
+            resource_tracker.register = register
+        array = np.ndarray(handle.shape, np.dtype(handle.dtype), buffer=shm.buf)
+        array.flags.writeable = False
+        _attached[handle.name] = (shm, array)
+        while len(_attached) > _max_attached:
+            _, (old, view) = _attached.popitem(last=False)
+            del view
+            try:
+                old.close()
+            except BufferError:
+                pass  # still referenced by a running task, unmapped when it is freed
+    return _attached[handle.name][1]
+
+def _kyber_keygen(k):
+    from kyber.keys import generate_keypair
+    return generate_keypair(k)
+
+def _kyber_encapsulate(At_handle, t_handle, messages):
+    from kyber.batch import encapsulate_ntt
+    return encapsulate_ntt(_attach(At_handle), _attach(t_handle), messages)
+
+def _kyber_decapsulate(s_hat, u, v):
+    from kyber.batch import decapsulate_ntt
+    return decapsulate_ntt(s_hat, u, v)
+
+def _falcon_keygen(n):
+    from falcon.ntrugen import ntru_gen
+    return ntru_gen(n)
+
+def _falcon_sign(key_id, basis, msg):
+    from falcon.falcon_fft import SecretKey, sign_message
+    if key_id not in _falcon_keys:
+        _falcon_keys[key_id] = SecretKey(*basis)
+    return sign_message(msg, _falcon_keys[key_id])
+
+def _falcon_verify(h_handle, msg, signature):
+    from falcon.falcon_fft import verify_signature
+    return verify_signature(msg, signature, _attach(h_handle))
+
+def _gather(futures, combine):
+    # one future that resolves to combine(results) once all parts are done
+    out = Future()
+    results = [None] * len(futures)
+    remaining = [len(futures)]
+
+    def done(i, f):
+        if out.done():
+            return
+        if f.exception() is not None:
+            out.set_exception(f.exception())
+            return
+        results[i] = f.result()
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            out.set_result(combine(results))
+
+    for i, f in enumerate(futures):
+        f.add_done_callback(lambda f, i=i: done(i, f))
+    return out
+
+class Executor:
+    def __init__(self, workers=None, max_segments=256):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_segments = max_segments
+        self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(max_segments,))
+        self._handles = OrderedDict()  # key -> [handle, segment, pinning tasks]
+        self._lock = threading.Lock()  # task callbacks release pins from another thread
+
+    def share(self, key, array, pin=False):
+        # place array in shared memory once per key, return its handle; with
+        # pin, the segment stays until _unpin_when_done releases it
+        with self._lock:
+            entry = self._handles.get(key)
+            if entry is None:
+                entry = self._handles[key] = [*SharedArray.create(array), 0]
+            self._handles.move_to_end(key)
+            entry[2] += pin
+            self._trim()
+            return entry[0]
+
+    def _trim(self):
+        # unlink least recently used segments no task is waiting on
+        for key in [key for key, entry in self._handles.items() if not entry[2]]:
+            if len(self._handles) <= self.max_segments:
+                break
+            _, shm, _ = self._handles.pop(key)
+            shm.close()
+            shm.unlink()
+
+    def _unpin_when_done(self, future, keys):
+        def release(_):
+            with self._lock:
+                for key in keys:
+                    self._handles[key][2] -= 1
+                self._trim()
+        future.add_done_callback(release)
+        return future
+
+    # Kyber
+
+    def kyber_keygen(self, k=2):
+        return self._pool.submit(_kyber_keygen, k)
+
+    def encapsulate(self, pk, messages):
+        messages = np.asarray(getattr(messages, "coeffs", messages))
+        # keyed by content: keys made in other processes (workers, unpickled)
+        # carry no process-wide identity
+        At_hat, t_hat = pk.At_hat, pk.t_hat
+        key_id = hashlib.blake2b(At_hat.tobytes() + t_hat.tobytes(), digest_size=16).digest()
+        keys = [("kyber-At", key_id), ("kyber-t", key_id)]
+        At_handle = self.share(keys[0], At_hat, pin=True)
+        t_handle = self.share(keys[1], t_hat, pin=True)
+        return self._unpin_when_done(self._pool.submit(_kyber_encapsulate, At_handle, t_handle, messages), keys)
+
+    def decapsulate(self, sk, u, v):
+        return self._pool.submit(_kyber_decapsulate, sk.s_hat, np.asarray(u), np.asarray(v))
+
+    def encapsulate_split(self, pk, messages):
+        # spread one (batch, n) request over all workers
+        messages = np.asarray(getattr(messages, "coeffs", messages))
+        parts = [self.encapsulate(pk, m) for m in np.array_split(messages, self.workers) if len(m)]
+        return _gather(parts, lambda rs: (np.concatenate([r[0] for r in rs]), np.concatenate([r[1] for r in rs])))
+
+    def decapsulate_split(self, sk, u, v):
+        chunks = zip(np.array_split(np.asarray(u), self.workers), np.array_split(np.asarray(v), self.workers))
+        parts = [self.decapsulate(sk, cu, cv) for cu, cv in chunks if len(cv)]
+        return _gather(parts, np.concatenate)
+
+    # Falcon
+
+    def falcon_keygen(self, n=512):
+        from falcon.falcon_fft import SecretKey
+        out = Future()
+
+        def done(f):
+            if f.exception() is not None:
+                out.set_exception(f.exception())
+            else:
+                sk = SecretKey(*f.result())
+                out.set_result((sk, sk.h))
+
+        self._pool.submit(_falcon_keygen, n).add_done_callback(done)
+        return out
+
+    def sign(self, sk, msg):
+        key_id = hashlib.blake2b(sk.f.tobytes() + sk.g.tobytes(), digest_size=16).digest()
+        return self._pool.submit(_falcon_sign, key_id, (sk.f, sk.g, sk.F, sk.G), msg)
+
+    def verify(self, h, msg, signature):
+        h = np.asarray(h)
+        key = ("falcon-h", h.tobytes())
+        handle = self.share(key, h, pin=True)
+        return self._unpin_when_done(self._pool.submit(_falcon_verify, handle, msg, signature), [key])
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        with self._lock:
+            for _, shm, _ in self._handles.values():
+                shm.close()
+                shm.unlink()
+            self._handles.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
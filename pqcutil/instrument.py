@@ -0,0 +1,110 @@
+import functools
+import json
+import os
+import time
+
+# Optional per-stage instrumentation. Every stage collects
+#   calls        number of times it ran
+#   seconds      wall time, inclusive of nested stages
+#   coeff_ops    coefficient-level operations, as reported by the stage
+#   alloc_bytes  bytes of the arrays the stage materialised (its outputs)
+# When disabled (the default; PQC_PROFILE=1 in the environment or enable()
+# turns it on), a stage costs one flag check: stage() hands back a shared
+# no-op context and timed() wrappers call straight through.
+#
+#   with instrument.stage("kyber.ntt") as st:
+#       ...
+#       st.add(coeff_ops=..., alloc_bytes=...)
+#
+# snapshot() returns the counters as a dict; write_jsonl() appends one JSON
+# line per stage, optionally tagged with labels (benchmark case, host, ...).
+
+enabled = bool(os.environ.get("PQC_PROFILE"))
+_stats = {}
+
+def enable(on=True):
+    global enabled
+    enabled = bool(on)
+
+def disable():
+    enable(False)
+
+def reset():
+    _stats.clear()
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, coeff_ops=0, alloc_bytes=0):
+        pass
+
+_null = _NullStage()
+
+class _Stage:
+    __slots__ = ("name", "start", "coeff_ops", "alloc_bytes")
+
+    def __init__(self, name):
+        self.name = name
+        self.coeff_ops = 0
+        self.alloc_bytes = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        entry = _stats.get(self.name)
+        if entry is None:
+            entry = _stats[self.name] = [0, 0.0, 0, 0]
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += self.coeff_ops
+        entry[3] += self.alloc_bytes
+        return False
+
+    def add(self, coeff_ops=0, alloc_bytes=0):
+        self.coeff_ops += int(coeff_ops)
+        self.alloc_bytes += int(alloc_bytes)
+
+def stage(name):
+    return _Stage(name) if enabled else _null
+
+def _nbytes(out):
+    if isinstance(out, tuple):
+        return sum(_nbytes(o) for o in out)
+    return getattr(out, "nbytes", 0)
+
+def timed(name, ops=None):
+    # decorator: the whole call is one stage; alloc_bytes is the size of the
+    # returned array(s), ops(result, *args) gives the coefficient operations
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            with _Stage(name) as st:
+                out = fn(*args, **kwargs)
+                st.add(ops(out, *args, **kwargs) if ops is not None else 0, _nbytes(out))
+            return out
+        return inner
+    return wrap
+
+def snapshot():
+    return {
+        name: {"calls": calls, "seconds": seconds, "coeff_ops": coeff_ops, "alloc_bytes": alloc_bytes}
+        for name, (calls, seconds, coeff_ops, alloc_bytes) in sorted(_stats.items())
+    }
+
+def write_jsonl(file, labels=None, stats=None):
+    # one line per stage; file is a path (appended to) or a text file object
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "a") as f:
+            return write_jsonl(f, labels, stats)
+    now = time.time()
+    for name, entry in (snapshot() if stats is None else stats).items():
+        file.write(json.dumps({"time": now, "stage": name, **entry, **(labels or {})}) + "\n")
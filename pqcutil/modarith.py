@@ -0,0 +1,149 @@
+import os
+import numpy as np
+from pqcutil.instrument import timed
+
+# Modular arithmetic on int32 lanes for the ring kernels, with lazy
+# reduction. Each intermediate array carries a bound (a Python int B with
+# |x| < B for every coefficient), and a kernel reduces only when the next
+# operation could overflow or leave the range its reduction accepts:
+#   Montgomery  x -> x * 2^-16 mod q,  in (-q, q), for |x| < q * 2^15
+#               (products with twiddles kept in Montgomery form x * 2^16)
+#   Barrett     x -> x mod q,          in (-q/2, q/2], for |x| < limit
+# Sums and differences are left unreduced while their bound allows. Outputs
+# are made canonical with a single int32 % q, which for one reduction of an
+# accumulated value is cheaper in numpy than Montgomery plus a correction.
+#
+# Bounds-checking mode (PQC_CHECK_BOUNDS=1 in the environment, or
+# set_check_bounds(True)) compares every tracked bound with the actual data
+# and raises BoundError when an array exceeds it.
+
+check_bounds = bool(os.environ.get("PQC_CHECK_BOUNDS"))
+
+class BoundError(AssertionError):
+    pass
+
+def set_check_bounds(enabled=True):
+    global check_bounds
+    check_bounds = bool(enabled)
+
+def check(a, bound, where):
+    if check_bounds and a.size:
+        peak = int(np.abs(a.astype(np.int64)).max())
+        if peak >= bound:
+            raise BoundError(f"{where}: |coefficient| = {peak} exceeds the tracked bound {bound}")
+    return a
+
+class Modulus:
+    def __init__(self, q, barrett_shift=26):
+        self.q = q
+        self.qinv = np.int16(((pow(q, -1, 1 << 16) + (1 << 15)) % (1 << 16)) - (1 << 15))
+        self.mont_limit = q << 15
+        self.lane_limit = 1 << 31
+        self.barrett_shift = barrett_shift
+        self.barrett_v = np.int32(((1 << barrett_shift) + q // 2) // q)
+        # |a| < barrett_limit keeps a * v plus the rounding term inside int32.
+        # The quotient is off from a / q by at most 1/2 + |a| |v q - 2^shift| / (q 2^shift),
+        # so outputs satisfy |x| <= q/2 + limit |v q - 2^shift| / 2^shift < barrett_bound
+        # (6153 for q = 12289, where v is 0.13 above 2^26 / q)
+        self.barrett_limit = ((1 << 31) - (1 << (barrett_shift - 1))) // int(self.barrett_v)
+        error = abs(int(self.barrett_v) * q - (1 << barrett_shift))
+        self.barrett_bound = q // 2 + 2 + ((self.barrett_limit * error) >> barrett_shift)
+        if check_bounds:
+            self.check_barrett()
+
+    def to_mont(self, values):
+        # constants x -> x * 2^16 mod q as int32, for use as Montgomery multipliers
+        return (np.asarray(values, dtype=np.int64) * (1 << 16) % self.q).astype(np.int32)
+
+    def mont(self, a, bound, where="montgomery"):
+        # a * 2^-16 mod q in (-q, q); needs |a| < q * 2^15
+        if bound > self.mont_limit:
+            raise BoundError(f"{where}: bound {bound} exceeds the Montgomery limit {self.mont_limit}")
+        check(a, bound, where)
+        t = a.astype(np.int16) * self.qinv  # wraps mod 2^16
+        return (a - t.astype(np.int32) * self.q) >> 16
+
+    def mul(self, a, b_mont, bound, where="mul"):
+        # a * b mod q in (-q, q) for int32 a and Montgomery-form b with |b| < q
+        return self.mont(a * b_mont, bound * self.q, where)
+
+    def barrett(self, a, bound, where="barrett"):
+        # a mod q, |result| < barrett_bound
+        if bound > self.barrett_limit:
+            raise BoundError(f"{where}: bound {bound} exceeds the Barrett limit {self.barrett_limit}")
+        check(a, bound, where)
+        t = (a * self.barrett_v + (1 << (self.barrett_shift - 1))) >> self.barrett_shift
+        return a - t * self.q
+
+    def check_barrett(self):
+        # every input Barrett accepts, against exact arithmetic; raises
+        # BoundError on a wrong residue or an output outside barrett_bound
+        a = np.arange(1 - self.barrett_limit, self.barrett_limit, dtype=np.int32)
+        x = self.barrett(a, self.barrett_limit, "barrett range check")
+        wrong = np.flatnonzero((x.astype(np.int64) - a) % self.q)
+        if len(wrong):
+            raise BoundError(f"barrett: wrong residue for a = {a[wrong[0]]}")
+        peak = int(np.abs(x).max())
+        if peak >= self.barrett_bound:
+            raise BoundError(f"barrett: output {peak} exceeds the bound {self.barrett_bound}")
+
+    # the final reduction of every kernel is a stage of its own; the per-layer
+    # Montgomery / Barrett steps are left unwrapped to keep the butterflies cheap
+    @timed("reduce.canonical", ops=lambda out, *args, **kwargs: out.size)
+    def canonical(self, a, bound, where="canonical"):
+        # a mod q in [0, q)
+        if bound > self.lane_limit:
+            raise BoundError(f"{where}: bound {bound} does not fit int32 lanes")
+        check(a, bound, where)
+        return a % np.int32(self.q)
+
+    def lanes(self, a):
+        # arbitrary integer coefficients -> (int32 array, bound); the bound of
+        # an input comes from one min / max scan, values too large for int32
+        # lanes are reduced first
+        a = np.asarray(a)
+        if not a.size:
+            return a.astype(np.int32), 1
+        bound = max(-int(a.min()), int(a.max())) + 1
+        if bound > self.barrett_limit:
+            return (a % self.q).astype(np.int32), self.q
+        return a.astype(np.int32, copy=False), bound
+
+    def fold(self, a, bound, limit, where):
+        # Barrett-reduce a if its bound exceeds limit
+        if bound > limit:
+            return self.barrett(a, bound, where), self.barrett_bound
+        return a, bound
+
+    def forward(self, a, zetas_mont, layers, bound):
+        # Cooley-Tukey layers (zeta index, half length) on (..., n) int32 lanes;
+        # the twiddle product is Montgomery-reduced, a0 +- t stays lazy
+        lead = a.shape[:-1]
+        size = a.shape[-1]
+        for z, length in layers:
+            # the twiddle product needs |a| <= 2^15 for the Montgomery range
+            a, bound = self.fold(a, bound, 1 << 15, "ntt layer input")
+            blocks = size // (2 * length)
+            a = a.reshape(lead + (blocks, 2, length))
+            t = self.mul(a[..., 1, :], zetas_mont[z:z + blocks, None], bound, "ntt twiddle")
+            a = np.stack((a[..., 0, :] + t, a[..., 0, :] - t), axis=-2)
+            bound += self.q
+            check(a, bound, "ntt butterfly")
+        return a.reshape(lead + (size,)), bound
+
+    def inverse(self, a, zetas_inv_mont, layers, bound, scale_mont):
+        # Gentleman-Sande layers in reverse, then a Montgomery multiply by scale
+        lead = a.shape[:-1]
+        size = a.shape[-1]
+        for z, length in reversed(layers):
+            # a0 + a1 doubles the bound and a0 - a1 feeds the Montgomery product
+            a, bound = self.fold(a, bound, 1 << 14, "intt layer input")
+            blocks = size // (2 * length)
+            a = a.reshape(lead + (blocks, 2, length))
+            lo = a[..., 0, :] + a[..., 1, :]
+            hi = self.mul(a[..., 0, :] - a[..., 1, :], zetas_inv_mont[z:z + blocks, None], 2 * bound, "intt twiddle")
+            a = np.stack((lo, hi), axis=-2)
+            bound = 2 * bound
+            check(a, bound, "intt butterfly")
+        a, bound = self.fold(a, bound, 1 << 15, "intt scale input")
+        return self.mul(a.reshape(lead + (size,)), scale_mont, bound, "intt scale"), self.q
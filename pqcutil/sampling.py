@@ -0,0 +1,101 @@
+import hashlib
+import os
+import numpy as np
+from pqcutil.instrument import timed
+
+# Noise sampling from a buffered randomness pool. Bytes come from
+# os.urandom (or from SHAKE-256(seed || counter), for reproducible streams)
+# in large refills, and every sampler turns a whole request into arrays at once.
+
+class RandomPool:
+    def __init__(self, seed=None, buffer_size=1 << 16, float_block=4096):
+        self.buffer_size = buffer_size
+        self.float_block = float_block
+        self.seed = None if seed is None else bytes(seed)
+        self._counter = 0
+        self._buf = b""
+        self._pos = 0
+        self._floats = []
+
+    def _refill(self, size):
+        size = max(size, self.buffer_size)
+        if self.seed is None:
+            return os.urandom(size)
+        self._counter += 1
+        return hashlib.shake_256(self.seed + self._counter.to_bytes(8, "little")).digest(size)
+
+    def read(self, size):
+        # size random bytes as a uint8 array
+        if self._pos + size > len(self._buf):
+            self._buf = self._buf[self._pos:] + self._refill(size)
+            self._pos = 0
+        out = np.frombuffer(self._buf, dtype=np.uint8, count=size, offset=self._pos)
+        self._pos += size
+        return out
+
+    def words(self, count, nbytes):
+        # count little-endian unsigned integers of nbytes bytes each
+        raw = self.read(count * nbytes).reshape(count, nbytes).astype(np.uint64)
+        return (raw << (8 * np.arange(nbytes, dtype=np.uint64))).sum(axis=-1, dtype=np.uint64)
+
+    def uniform(self, shape):
+        # floats in [0, 1) with 53 random bits
+        size = int(np.prod(shape))
+        return (self.words(size, 7) >> np.uint64(3)).astype(np.float64).reshape(shape) / float(1 << 53)
+
+    def random(self):
+        # one float in [0, 1), served from a block of uniforms; for scalar
+        # samplers such as Falcon's samplerz
+        if not self._floats:
+            self._floats = self.uniform((self.float_block,)).tolist()[::-1]
+        return self._floats.pop()
+
+    def integers(self, low, high, shape):
+        return (low + np.floor(self.uniform(shape) * (high - low))).astype(np.int64)
+
+default_pool = RandomPool()
+
+@timed("sample.cbd", ops=lambda out, *args, **kwargs: out.size)
+def cbd(eta, shape, pool=None):
+    # centred binomial: (a_1 + ... + a_eta) - (b_1 + ... + b_eta) over random
+    # bits, signed int16 values in [-eta, eta]
+    pool = default_pool if pool is None else pool
+    shape = tuple(np.atleast_1d(shape))
+    size = int(np.prod(shape))
+    if eta == 2 and size % 8 == 0:
+        # 8 coefficients per 32-bit word: pairwise bit sums in one mask
+        t = pool.words(size // 8, 4)
+        d = (t & np.uint64(0x55555555)) + ((t >> np.uint64(1)) & np.uint64(0x55555555))
+        shifts = np.arange(0, 32, 4, dtype=np.uint64)
+        a = (d[:, None] >> shifts) & np.uint64(3)
+        b = (d[:, None] >> (shifts + np.uint64(2))) & np.uint64(3)
+    elif eta == 3 and size % 4 == 0:
+        # 4 coefficients per 24-bit word
+        t = pool.words(size // 4, 3)
+        mask = np.uint64(0x249249)
+        d = (t & mask) + ((t >> np.uint64(1)) & mask) + ((t >> np.uint64(2)) & mask)
+        shifts = np.arange(0, 24, 6, dtype=np.uint64)
+        a = (d[:, None] >> shifts) & np.uint64(7)
+        b = (d[:, None] >> (shifts + np.uint64(3))) & np.uint64(7)
+    else:
+        bits = np.unpackbits(pool.read((2 * eta * size + 7) // 8))[:2 * eta * size]
+        bits = bits.reshape(size, 2, eta).sum(axis=-1)
+        a, b = bits[:, 0], bits[:, 1]
+    return (a.astype(np.int16) - b.astype(np.int16)).reshape(shape)
+
+@timed("sample.gaussian", ops=lambda out, *args, **kwargs: out.size)
+def discrete_gaussian(sigma, shape, tau=10, pool=None):
+    # D_{Z, sigma} by rejection from the uniform distribution on
+    # [-tau*sigma, tau*sigma], drawn in oversized vectorised rounds
+    pool = default_pool if pool is None else pool
+    shape = tuple(np.atleast_1d(shape))
+    size = int(np.prod(shape))
+    bound = int(np.ceil(tau * sigma))
+    accept_rate = np.sqrt(2 * np.pi) * sigma / (2 * bound + 1)
+    out = np.empty(0, dtype=np.int64)
+    while len(out) < size:
+        m = int((size - len(out)) / accept_rate * 1.2) + 16
+        z = pool.integers(-bound, bound + 1, (m,))
+        keep = pool.uniform((m,)) < np.exp(-z.astype(np.float64) ** 2 / (2 * sigma * sigma))
+        out = np.concatenate((out, z[keep]))
+    return out[:size].reshape(shape)